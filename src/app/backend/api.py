@@ -1,12 +1,58 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import hmac
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, List, Literal
+from typing import Dict, List, Literal, Optional
 
-from main import scrape_page, analyze_with_gemini, revise_article_with_gemini
+from deadline import MAX_BUDGET, Deadline, DeadlineExceeded
+from limits import AdaptiveLimiter, Overloaded
+from linkcheck import CHECK_BUDGET, TIMEOUT as LINK_TIMEOUT, add_link_issues, check_links
+from main import CATEGORIES, INPUT_ERRORS, scrape_document, analyze_with_gemini, revise_article_with_gemini, revise_article_with_patches, save_results, results_store, model_router, search_index
+from profiling import ProfileStore, StackSampler, profile_process
+from reports import build_report, export_csv, export_parquet, load_scores, page_table
 
 app = FastAPI()
 
+# Revisions for /analyze-and-revise run here so they start while the
+# analysis is still being sent to the client
+revision_executor = ThreadPoolExecutor(max_workers=4)
+
+# Link checks run here alongside the Gemini analysis of the same page
+link_executor = ThreadPoolExecutor(max_workers=4)
+# Time for a stopped link check to cancel its requests and report
+LINK_STOP_WAIT = 1.0
+
+# Admission control: each headless browser costs hundreds of MB, so the
+# scrape stage starts lower than the Gemini stage. Cancelled requests and
+# bad input (unreachable URLs, empty pages, unusable model output) say
+# nothing about stage health, so they don't shrink the limits. Queued
+# requests wait as long as their deadline allows (see stage_wait), so the
+# limiters' own queue timeout is only a backstop.
+scrape_limiter = AdaptiveLimiter("scrape", initial_limit=2, max_limit=8, max_queue=8,
+                                 queue_timeout=MAX_BUDGET, neutral_errors=(DeadlineExceeded,) + INPUT_ERRORS)
+llm_limiter = AdaptiveLimiter("llm", initial_limit=4, max_limit=32, max_queue=32,
+                              queue_timeout=MAX_BUDGET, neutral_errors=(DeadlineExceeded,) + INPUT_ERRORS)
+# Time a stage needs once it has a slot: a scrape spends 10s waiting out
+# Cloudflare plus the page load, so waiting for a slot is pointless once
+# less than this is left in the request's budget
+SCRAPE_SECONDS = 15.0
+LLM_SECONDS = 5.0
+
+# Profiling is off unless PROFILING_TOKEN is set; requests opt in by sending
+# the token in an X-Profile header or ?profile= query parameter
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN")
+profile_store = ProfileStore()
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
@@ -29,43 +75,199 @@ class Analysis(BaseModel):
     completeness: CategoryData
     style_guidelines: CategoryData
 
+class Timings(BaseModel):
+    budget_ms: int
+    elapsed_ms: int
+    stages_ms: Dict[str, int]
+
+class BrokenLink(BaseModel):
+    url: str
+    target: str
+    reason: str
+
 class AnalysisResponse(BaseModel):
     content: str
     analysis: Analysis
+    broken_links: List[BrokenLink] = []
+    timings: Optional[Timings] = None
 
 class ReviseRequest(BaseModel):
     content: str
     suggestions: Dict[str, CategoryData]  # Change Analysis to Dict[str, CategoryData]
+    mode: Literal["full", "patch"] = "full"
+    url: Optional[str] = None  # Saves the revision to the results history when given with every category
 
 class ReviseResponse(BaseModel):
     revised: str
+    diff: Optional[str] = None
+    timings: Optional[Timings] = None
+
+class AnalyzeAndReviseRequest(BaseModel):
+    url: str
+    mode: Literal["full", "patch"] = "patch"
+
+class StoredResult(BaseModel):
+    id: int
+    url: str
+    created_at: float
+    content_hash: Optional[str] = None
+    overall_score: Optional[str] = None
+    analysis: Analysis
+    revision: Optional[str] = None
+
+def overloaded_error(e, headers=None):
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after), **(headers or {})})
+
+def deadline_error(e, headers=None):
+    return HTTPException(status_code=504, detail=str(e), headers=headers)
+
+def stage_wait(deadline, stage_seconds):
+    """Longest a request may queue for a slot and still finish the stage in its budget."""
+    return deadline.remaining() - stage_seconds
+
+@contextmanager
+def llm_slot(deadline):
+    """
+    An LLM limiter slot whose latency is judged against earlier requests
+    that called the same model tiers.
+
+    A pro-tier call on a long page or a cascade that escalated through two
+    tiers is slower than a lite call by design, not because the endpoint
+    is saturated.
+    """
+    with llm_limiter.slot(stage_wait(deadline, LLM_SECONDS)) as slot, model_router.tracking() as route:
+        try:
+            yield
+        finally:
+            slot.latency_key = ">".join(route)
+
+def scrape_and_analyze(url, deadline):
+    # Don't start a browser for a request the LLM stage would shed anyway
+    llm_limiter.check()
+    with deadline.stage("scrape"), scrape_limiter.slot(stage_wait(deadline, SCRAPE_SECONDS)):
+        page = scrape_document(url, deadline)
+    content = page["content"]
+    # Links are checked while the model analyzes the page, and the check is
+    # stopped once the analysis is done: links it hasn't reached by then are
+    # left unchecked rather than holding up the response and the revision
+    link_budget = min(CHECK_BUDGET, max(deadline.remaining(), 1))
+    stop_links = threading.Event()
+    links = link_executor.submit(check_links, page["links"], url, page["anchors"],
+                                 timeout=min(LINK_TIMEOUT, link_budget), budget=link_budget, stop=stop_links)
+    try:
+        with deadline.stage("analysis"), llm_slot(deadline):
+            analysis = analyze_with_gemini(content, url, deadline)
+    finally:
+        stop_links.set()
+    
+    # Validate analysis structure
+    if not all(key in analysis for key in CATEGORIES):
+        raise ValueError("Invalid analysis structure")
+    
+    # A slow or failed link check shouldn't cost the analysis
+    with deadline.stage("links"):
+        try:
+            link_report = links.result(timeout=LINK_STOP_WAIT)
+        except FutureTimeout:
+            print(f"Link check for {url} didn't stop in time")
+            return content, analysis, []
+        except Exception as e:
+            print(f"Error checking links for {url}: {e}")
+            return content, analysis, []
+    add_link_issues(analysis, link_report)
+    return content, analysis, link_report["broken"]
+
+def run_revision(content, analysis, mode, deadline):
+    with deadline.stage("revision"), llm_slot(deadline):
+        if mode == "patch":
+            result = revise_article_with_patches(content, analysis, deadline)
+            return {"revised": result["revised"], "diff": result["diff"]}
+        return {"revised": revise_article_with_gemini(content, analysis, deadline)}
+
+async def watch_disconnect(raw_request, deadline):
+    """Cancel the request's deadline as soon as the client goes away."""
+    while not deadline.cancelled.is_set():
+        if await raw_request.is_disconnected():
+            deadline.cancel("client disconnected")
+            return
+        await asyncio.sleep(0.5)
+
+async def run_cancellable(raw_request, deadline, func, *args, profile=None):
+    """Run blocking pipeline work in the threadpool, cancelling it on client disconnect."""
+    if profile:
+        func = profile.track(func)
+    watcher = asyncio.create_task(watch_disconnect(raw_request, deadline))
+    try:
+        return await run_in_threadpool(func, *args)
+    finally:
+        watcher.cancel()
+
+def valid_profiling_token(value):
+    return bool(PROFILING_TOKEN and value and hmac.compare_digest(value, PROFILING_TOKEN))
+
+def start_profile(raw_request):
+    """Start sampling this request's worker threads if it asked for a profile."""
+    if not PROFILING_TOKEN:
+        return None
+    flag = raw_request.headers.get("X-Profile") or raw_request.query_params.get("profile")
+    if not valid_profiling_token(flag):
+        return None
+    return StackSampler().start()
+
+def profile_headers(profile):
+    """Headers naming a request's profile; errors need them passed explicitly."""
+    return {"X-Profile-Id": profile.id} if profile else None
+
+def finish_profile(profile, headers=None):
+    if profile:
+        profile.stop()
+        profile_store.add(profile)
+        if headers is not None:
+            headers["X-Profile-Id"] = profile.id
+
+def require_admin(raw_request):
+    if not PROFILING_TOKEN:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not valid_profiling_token(raw_request.headers.get("X-Admin-Token")):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
 
 @app.post("/analyze", response_model=AnalysisResponse)
-def analyze_doc(request: AnalyzeRequest):
+async def analyze_doc(request: AnalyzeRequest, raw_request: Request, response: Response):
     url = request.url.strip()   
     if not url:
         raise HTTPException(status_code=400, detail="URL is required")
+    deadline = Deadline.from_header(raw_request.headers.get("X-Request-Timeout"))
+    profile = start_profile(raw_request)
     try:
-        content = scrape_page(url)
-        analysis = analyze_with_gemini(content, url)
-        
-        # Validate analysis structure
-        if not all(key in analysis for key in ["readability", "structure", "completeness", "style_guidelines"]):
-            raise ValueError("Invalid analysis structure")
+        content, analysis, broken_links = await run_cancellable(
+            raw_request, deadline, scrape_and_analyze, url, deadline, profile=profile
+        )
+        save_results(url, analysis, content=content, background=True)
             
         return {
             "content": content,
-            "analysis": analysis
+            "analysis": analysis,
+            "broken_links": broken_links,
+            "timings": deadline.report()
         }
+    except Overloaded as e:
+        raise overloaded_error(e, profile_headers(profile))
+    except DeadlineExceeded as e:
+        raise deadline_error(e, profile_headers(profile))
     except ValueError as e:
-        raise HTTPException(status_code=422, detail=str(e))
+        raise HTTPException(status_code=422, detail=str(e), headers=profile_headers(profile))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=str(e), headers=profile_headers(profile))
+    finally:
+        deadline.close()
+        finish_profile(profile, response.headers)
 
 @app.post("/revise", response_model=ReviseResponse)
-def revise_doc(request: ReviseRequest):
+async def revise_doc(request: ReviseRequest, raw_request: Request, response: Response):
     if not request.content or not request.suggestions:
         raise HTTPException(status_code=400, detail="Content and suggestions are required")
+    deadline = Deadline.from_header(raw_request.headers.get("X-Request-Timeout"))
+    profile = start_profile(raw_request)
     try:
         # Convert suggestions to dict format that revise_article_with_gemini expects
         suggestions_dict = {
@@ -75,11 +277,154 @@ def revise_doc(request: ReviseRequest):
                 'suggestions': v.suggestions
             } for k, v in request.suggestions.items()
         }
-        revised = revise_article_with_gemini(request.content, suggestions_dict)
-        return {"revised": revised}
+        result = await run_cancellable(
+            raw_request, deadline, run_revision, request.content, suggestions_dict, request.mode, deadline,
+            profile=profile
+        )
+        # Partial suggestions would become the page's latest analysis
+        if request.url and all(key in suggestions_dict for key in CATEGORIES):
+            save_results(request.url, suggestions_dict, result["revised"], request.content, background=True)
+        return {**result, "timings": deadline.report()}
+    except Overloaded as e:
+        raise overloaded_error(e, profile_headers(profile))
+    except DeadlineExceeded as e:
+        raise deadline_error(e, profile_headers(profile))
     except Exception as e:
         print(f"Error in revision: {str(e)}")  # Add debugging
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=str(e), headers=profile_headers(profile))
+    finally:
+        deadline.close()
+        finish_profile(profile, response.headers)
+
+@app.post("/analyze-and-revise")
+async def analyze_and_revise_doc(request: AnalyzeAndReviseRequest, raw_request: Request):
+    """
+    Analyze and revise in one request, streamed as newline-delimited JSON.
+
+    The first line is {"type": "analysis", ...}; revision starts as soon as
+    the analysis has been parsed, reusing the scraped content, and arrives
+    as a second {"type": "revision", ...} (or {"type": "error", ...}) line.
+    Both stages share one deadline, reported on the last line.
+    """
+    url = request.url.strip()
+    if not url:
+        raise HTTPException(status_code=400, detail="URL is required")
+    deadline = Deadline.from_header(raw_request.headers.get("X-Request-Timeout"))
+    profile = start_profile(raw_request)
+    analyzed = False
+    try:
+        content, analysis, broken_links = await run_cancellable(
+            raw_request, deadline, scrape_and_analyze, url, deadline, profile=profile
+        )
+        analyzed = True
+    except Overloaded as e:
+        raise overloaded_error(e, profile_headers(profile))
+    except DeadlineExceeded as e:
+        raise deadline_error(e, profile_headers(profile))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e), headers=profile_headers(profile))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e), headers=profile_headers(profile))
+    finally:
+        # On success both are finished once the stream completes
+        if not analyzed:
+            deadline.close()
+            finish_profile(profile)
+
+    revise = profile.track(run_revision) if profile else run_revision
+    revision = revision_executor.submit(revise, content, analysis, request.mode, deadline)
+
+    async def stream():
+        try:
+            yield json.dumps({"type": "analysis", "content": content, "analysis": analysis,
+                              "broken_links": broken_links}) + "\n"
+            try:
+                result = await asyncio.wrap_future(revision)
+                save_results(url, analysis, result["revised"], content, background=True)
+                yield json.dumps({"type": "revision", **result, "timings": deadline.report()}) + "\n"
+            except Exception as e:
+                print(f"Error in revision: {str(e)}")
+                save_results(url, analysis, content=content, background=True)
+                yield json.dumps({"type": "error", "detail": str(e), "timings": deadline.report()}) + "\n"
+        finally:
+            # The stream is torn down early when the client disconnects
+            if not revision.done():
+                deadline.cancel("client disconnected")
+            deadline.close()
+            finish_profile(profile)
+
+    headers = profile_headers(profile)
+    return StreamingResponse(stream(), media_type="application/x-ndjson", headers=headers)
+
+@app.get("/results", response_model=List[StoredResult])
+def get_results(url: Optional[str] = None, limit: int = 20, since: Optional[float] = None):
+    """Result history, newest first, optionally for one URL and/or since a Unix time."""
+    return results_store.history(url=url, limit=min(max(limit, 1), 500), since=since)
+
+@app.get("/results/latest", response_model=StoredResult)
+def get_latest_result(url: str):
+    result = results_store.latest(url.strip())
+    if result is None:
+        raise HTTPException(status_code=404, detail="No results for this URL")
+    return result
+
+@app.get("/reports")
+def get_reports(days: Optional[float] = None, period: Literal["day", "week"] = "day", worst: int = 20,
+                format: Literal["json", "csv", "parquet"] = "json"):
+    """Site-wide score report; csv/parquet return the per-page score table."""
+    since = time.time() - days * 86400 if days else None
+    if format == "json":
+        return build_report(results_store, since=since, period=period, worst=min(max(worst, 1), 1000))
+    pages = page_table(load_scores(results_store, since=since))
+    if format == "csv":
+        return Response(export_csv(pages), media_type="text/csv",
+                        headers={"Content-Disposition": "attachment; filename=pages.csv"})
+    try:
+        return Response(export_parquet(pages), media_type="application/octet-stream",
+                        headers={"Content-Disposition": "attachment; filename=pages.parquet"})
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+@app.get("/admin/profile", response_class=PlainTextResponse)
+def profile_live_process(raw_request: Request, seconds: float = 10.0):
+    """Sample every thread of the running service for N seconds (max 60)."""
+    require_admin(raw_request)
+    seconds = min(max(seconds, 0.1), 60.0)
+    return PlainTextResponse(
+        profile_process(seconds),
+        headers={"Content-Disposition": "attachment; filename=process.folded"}
+    )
+
+@app.get("/admin/profiles")
+def list_request_profiles(raw_request: Request):
+    """Ids of the stored per-request profiles, newest first."""
+    require_admin(raw_request)
+    return {"profiles": profile_store.ids()}
+
+@app.get("/admin/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_request_profile(profile_id: str, raw_request: Request):
+    """Download a per-request profile by the X-Profile-Id it was returned with."""
+    require_admin(raw_request)
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(
+        profile,
+        headers={"Content-Disposition": f"attachment; filename=request-{profile_id}.folded"}
+    )
+
+@app.get("/search")
+def search_docs(q: str, limit: int = 5):
+    """Keyword search over every scraped page."""
+    return {"hits": search_index.search(q, limit=min(max(limit, 1), 50)), "index": search_index.stats()}
+
+@app.get("/limits")
+def get_limits():
+    return {"scrape": scrape_limiter.stats(), "llm": llm_limiter.stats()}
+
+@app.get("/routing")
+def get_routing():
+    return model_router.stats()
 
 if __name__ == "__main__":
     import uvicorn
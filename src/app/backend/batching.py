@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Batch analysis for short documentation pages.
+Packs several short documents into one Gemini request under a token budget
+and splits the response back into per-URL analyses.
+"""
+
+import argparse
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from main import (
+    CATEGORIES,
+    call_model,
+    model_router,
+    scrape_document,
+    analyze_with_gemini,
+    validate_analysis,
+    strip_code_fence,
+    print_results,
+    calculate_overall_score,
+    results_store,
+    search_index,
+    snapshot_store,
+    RESULTS_DB,
+)
+from linkcheck import add_link_issues, check_links
+from results_store import make_record
+from tab_scraper import TabScraper
+
+# Rough budget for the documents in a single batched request
+MAX_BATCH_TOKENS = 12000
+# Pages longer than this are analyzed on their own
+MAX_DOC_TOKENS = 2500
+MAX_BATCH_DOCS = 8
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def pack_documents(documents, max_batch_tokens=MAX_BATCH_TOKENS,
+                   max_doc_tokens=MAX_DOC_TOKENS, max_batch_docs=MAX_BATCH_DOCS):
+    """
+    Group short documents into batches that fit the token budget.
+
+    Args:
+        documents (list): (url, content) pairs
+        max_batch_tokens (int): Token budget for the documents of one batch
+        max_doc_tokens (int): Documents above this are not batched
+        max_batch_docs (int): Maximum number of documents per batch
+
+    Returns:
+        tuple: (batches, singles) where batches is a list of lists of
+        (url, content) pairs and singles are the documents too long to pack
+    """
+    batches = []
+    singles = []
+    current = []
+    current_tokens = 0
+
+    # Largest first so small pages fill the gaps left in each batch
+    short_docs = []
+    for url, content in documents:
+        tokens = estimate_tokens(content)
+        if tokens > max_doc_tokens:
+            singles.append((url, content))
+        else:
+            short_docs.append((tokens, url, content))
+    short_docs.sort(key=lambda doc: doc[0], reverse=True)
+
+    for tokens, url, content in short_docs:
+        if current and (current_tokens + tokens > max_batch_tokens or len(current) >= max_batch_docs):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append((url, content))
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+
+    return batches, singles
+
+
+def build_batch_prompt(batch):
+    """Build one prompt covering every document in the batch, keyed doc_1..doc_N."""
+    documents_text = ""
+    for i, (url, content) in enumerate(batch, 1):
+        documents_text += f"\n=== doc_{i} ===\nArticle URL: {url}\nContent: {content}\n"
+
+    return f"""
+Analyze each of these MoEngage documentation articles and provide structured feedback.
+Return only a JSON object with one key per document (doc_1, doc_2, ...).
+Each value must be exactly this format, with these exact keys and value types:
+{{
+  "readability": {{
+    "score": "Good",  # Must be exactly one of: Excellent, Good, Fair, Poor
+    "issues": ["issue 1", "issue 2"],  # List of strings
+    "suggestions": ["suggestion 1", "suggestion 2"]  # List of strings
+  }},
+  "structure": {{ ...same fields... }},
+  "completeness": {{ ...same fields... }},
+  "style_guidelines": {{ ...same fields... }}
+}}
+{documents_text}
+Remember:
+1. Return ONLY the JSON object, with keys doc_1 to doc_{len(batch)}
+2. Analyze each document on its own; do not mix feedback between documents
+3. Scores must be exactly one of: Excellent, Good, Fair, Poor
+4. Use the exact category names: {", ".join(CATEGORIES)}
+"""
+
+
+def analyze_batch_with_gemini(batch):
+    """
+    Analyze a batch of documents with a single Gemini call.
+
+    Returns:
+        tuple: (results, failed) where results maps URL to a validated
+        analysis and failed lists the (url, content) pairs whose part of the
+        response was missing or invalid
+    """
+    print(f"Analyzing batch of {len(batch)} documents with Gemini...")
+
+    def validate(response_text):
+        data = json.loads(strip_code_fence(response_text))
+        if not isinstance(data, dict):
+            raise ValueError("Batch response must be a JSON object")
+
+        results = {}
+        failed = []
+        for i, (url, content) in enumerate(batch, 1):
+            try:
+                results[url] = validate_analysis(data.get(f"doc_{i}"))
+            except ValueError as e:
+                print(f"Invalid batch result for {url}: {e}")
+                failed.append((url, content))
+        if not results:
+            raise ValueError("No valid documents in batch response")
+        # Dropped documents suggest the tier couldn't keep the batch apart
+        return (results, failed), not failed
+
+    # Route on the longest page, not the combined batch, so packing short
+    # pages doesn't push them onto a pricier tier than analyzing them alone
+    longest = max((content for _, content in batch), key=lambda content: len(content.split()))
+    return model_router.run("analysis", longest, call_model(build_batch_prompt(batch)), validate)
+
+
+def analyze_documents(documents, on_result=None):
+    """
+    Analyze many documents, batching the short ones.
+
+    Falls back to one analyze_with_gemini call per document when a batch
+    call fails, its response cannot be parsed or a document's entry is
+    invalid. A document whose own call fails is recorded and skipped, so
+    one model error doesn't cost the rest of the run.
+
+    Args:
+        documents (list): (url, content) pairs
+        on_result (callable): Called as on_result(url, analysis) as soon as
+            each analysis is ready, so finished work can be saved early
+
+    Returns:
+        tuple: (results, errors) where results maps URL to analysis and
+        errors maps URL to a message
+    """
+    batches, singles = pack_documents(documents)
+    results, errors = {}, {}
+    calls = 0
+
+    def finish(url, analysis):
+        results[url] = analysis
+        if on_result:
+            on_result(url, analysis)
+
+    for batch in batches:
+        if len(batch) == 1:
+            singles.extend(batch)
+            continue
+        calls += 1
+        try:
+            batch_results, failed = analyze_batch_with_gemini(batch)
+        except (json.JSONDecodeError, ValueError) as e:
+            print(f"Error parsing batch response: {e}, analyzing documents individually")
+            batch_results, failed = {}, batch
+        except Exception as e:
+            # API, quota and timeout errors; single calls may still succeed
+            print(f"Error analyzing batch: {e}, analyzing documents individually")
+            batch_results, failed = {}, batch
+        for url, analysis in batch_results.items():
+            finish(url, analysis)
+        singles.extend(failed)
+
+    for url, content in singles:
+        calls += 1
+        try:
+            analysis = analyze_with_gemini(content, url)
+        except Exception as e:
+            print(f"Error analyzing {url}: {e}")
+            errors[url] = str(e)
+            continue
+        finish(url, analysis)
+
+    print(f"Analyzed {len(results)} of {len(documents)} documents with {calls} model calls")
+    return results, errors
+
+
+def main():
+    """Scrape and analyze every URL given on the command line."""
+    parser = argparse.ArgumentParser(description="Scrape and analyze documentation pages in batches")
+    parser.add_argument("urls", nargs="+", help="Pages to analyze")
+    parser.add_argument("--tabs", type=int, default=0,
+                        help="Scrape this many pages at once in tabs of one browser (default: one browser per page)")
+    args = parser.parse_args()
+    urls = [url for url in args.urls if url.startswith(('http://', 'https://'))]
+    if not urls:
+        parser.error("no http(s) URLs given")
+
+    pages = {}
+    if args.tabs:
+        with TabScraper(tabs=args.tabs, snapshot_store=snapshot_store) as scraper:
+            pages, errors = scraper.scrape(urls)
+        for url in urls:
+            if url in pages:
+                search_index.add(url, pages[url]["content"])
+            else:
+                print(f"Skipping {url}: {errors[url]}")
+        print(f"Scraper: {scraper.stats()}")
+    else:
+        for url in urls:
+            try:
+                pages[url] = scrape_document(url)
+            except Exception as e:
+                print(f"Skipping {url}: {e}")
+    documents = [(url, pages[url]["content"]) for url in urls if url in pages]
+
+    contents = dict(documents)
+    saved = []
+
+    def save(url, analysis):
+        try:
+            add_link_issues(analysis, link_checks[url].result())
+        except Exception as e:
+            print(f"Error checking links for {url}: {e}")
+        print_results(url, analysis)
+        results_store.submit(make_record(url, analysis, calculate_overall_score(analysis), contents[url]))
+        saved.append(url)
+
+    # Link checks share one result cache, so links common to many pages are
+    # fetched once; they run while the pages are analyzed. Each analysis is
+    # saved as soon as it is ready, so an interrupted run keeps what finished.
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        link_checks = {
+            url: executor.submit(check_links, page["links"], url, page["anchors"])
+            for url, page in pages.items()
+        }
+        try:
+            _, failed = analyze_documents(documents, on_result=save)
+        finally:
+            results_store.flush()
+            print(f"\nSaved {len(saved)} results to: {RESULTS_DB}")
+    for url, message in failed.items():
+        print(f"Not analyzed {url}: {message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Local benchmark for the link checker.
+Checks every page of a fixture site (see fixture_site.py) with the shared
+cache, verifies the broken links found against the ones the site planted,
+and compares the time with checking each link sequentially.
+
+Example:
+    python bench_linkcheck.py --pages 20 --links 300 --latency 0.02
+"""
+
+import argparse
+import time
+
+import httpx
+
+from extraction import extract_page
+from fixture_site import FixtureSite, serve
+from linkcheck import LinkCache, check_links, normalize_links
+
+
+def check_site(site, base_url):
+    """Check all pages with one shared cache; return (elapsed seconds, links checked, mismatched pages)."""
+    cache = LinkCache()
+    checked = 0
+    mismatched = 0
+    start = time.perf_counter()
+    with httpx.Client() as client:
+        for url in site.urls(base_url):
+            page = extract_page(client.get(url).text)
+            report = check_links(page["links"], url, page["anchors"], cache=cache)
+            checked += report["checked"]
+            found = {item["url"] for item in report["broken"]}
+            if found != site.expected_broken[url[len(base_url):]]:
+                mismatched += 1
+    return time.perf_counter() - start, checked, mismatched
+
+
+def check_sequential(site, base_url):
+    """One GET per distinct target on each page, no concurrency or shared cache; return elapsed seconds."""
+    start = time.perf_counter()
+    with httpx.Client() as client:
+        for url in site.urls(base_url):
+            page = extract_page(client.get(url).text)
+            for target in {target for _, target, _ in normalize_links(page["links"], url)}:
+                client.get(target)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the link checker against a local fixture site")
+    parser.add_argument("--pages", type=int, default=20, help="Number of fixture pages")
+    parser.add_argument("--links", type=int, default=300, help="Links per page")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds added to every response")
+    args = parser.parse_args()
+
+    site = FixtureSite(args.pages, args.links, latency=args.latency)
+    server, base_url = serve(site)
+    try:
+        elapsed, checked, mismatched = check_site(site, base_url)
+        print(f"Link checker: {checked} links on {args.pages} pages in {elapsed:.2f}s, "
+              f"{mismatched} pages with unexpected results")
+        elapsed = check_sequential(site, base_url)
+        print(f"Sequential GETs: {elapsed:.2f}s")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Local benchmark for model routing and cascading.
+Runs ModelRouter against a fake multi-tier backend whose tiers differ in
+latency and answer quality, and compares cascade routing with always using
+the standard tier. Needs no API key.
+
+Example:
+    python bench_routing.py --docs 200 --scale 0.01
+"""
+
+import argparse
+import json
+import random
+import time
+
+from routing import ModelRouter
+
+CATEGORIES = ["readability", "structure", "completeness", "style_guidelines"]
+
+# model -> (latency in seconds, chance of invalid JSON, chance of a low-confidence answer)
+FAKE_TIERS = {
+    "fake-lite": (0.8, 0.05, 0.15),
+    "fake-standard": (2.5, 0.02, 0.05),
+    "fake-pro": (8.0, 0.0, 0.0),
+}
+
+
+class FakeModelBackend:
+    """Stands in for Gemini: sleeps for the tier's latency and returns analysis JSON."""
+
+    def __init__(self, tiers=FAKE_TIERS, scale=1.0):
+        self.tiers = tiers
+        self.scale = scale
+
+    def call(self, model_name, content):
+        latency, invalid_rate, weak_rate = self.tiers[model_name]
+        # Longer documents take proportionally longer to read
+        time.sleep(latency * self.scale * (1 + len(content.split()) / 10000))
+
+        roll = random.random()
+        if roll < invalid_rate:
+            return '{"readability": {"score": "Good", "issues": ['
+        weak = roll < invalid_rate + weak_rate
+        return json.dumps({
+            category: {
+                "score": "Fair",
+                "issues": [] if weak else [f"{category} issue"],
+                "suggestions": [f"{category} suggestion"]
+            }
+            for category in CATEGORIES
+        })
+
+
+def validate(response_text):
+    """Minimal version of the analysis checks in main.py."""
+    analysis = json.loads(response_text)
+    for category in CATEGORIES:
+        if not isinstance(analysis.get(category), dict):
+            raise ValueError(f"Missing required category: {category}")
+    confident = all(analysis[category]["issues"] for category in CATEGORIES)
+    return analysis, confident
+
+
+def run(router, backend, documents):
+    """Analyze every document; return (elapsed seconds, documents left without a valid answer)."""
+    start = time.perf_counter()
+    unanswered = 0
+    for content in documents:
+        try:
+            router.run("analysis", content, lambda model: backend.call(model, content), validate)
+        except ValueError:
+            unanswered += 1
+    return time.perf_counter() - start, unanswered
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cascade routing against a fake multi-tier backend")
+    parser.add_argument("--docs", type=int, default=100, help="Number of synthetic documents")
+    parser.add_argument("--scale", type=float, default=0.01, help="Multiplier applied to fake latencies")
+    args = parser.parse_args()
+
+    # Mostly short help-center pages with a tail of long references
+    documents = [
+        " ".join(["word"] * int(random.choice([300, 600, 1200, 1200, 4000, 12000])))
+        for _ in range(args.docs)
+    ]
+    tiers = [("lite", "fake-lite"), ("standard", "fake-standard"), ("pro", "fake-pro")]
+    backend = FakeModelBackend(scale=args.scale)
+
+    cascade = ModelRouter(tiers, cascade=True)
+    elapsed, unanswered = run(cascade, backend, documents)
+    print(f"Cascade routing: {elapsed:.2f}s for {args.docs} documents, {unanswered} unanswered")
+    for name, stats in cascade.stats().items():
+        print(f"  {name}: {stats}")
+
+    baseline = ModelRouter([("standard", "fake-standard")], cascade=False)
+    elapsed, unanswered = run(baseline, backend, documents)
+    print(f"\nAlways standard tier: {elapsed:.2f}s for {args.docs} documents, {unanswered} unanswered")
+    for name, stats in baseline.stats().items():
+        print(f"  {name}: {stats}")
+
+
+if __name__ == "__main__":
+    main()
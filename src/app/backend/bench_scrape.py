@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Local benchmark for multi-tab scraping.
+Scrapes a fixture site (see fixture_site.py) with TabScraper and with one
+browser per page on a pool of worker threads, and reports pages per second
+and the peak RSS of the browser processes. Needs Chrome and chromedriver,
+but no network.
+
+Example:
+    python bench_scrape.py --pages 40 --concurrency 4 --latency 0.5
+"""
+
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from extraction import extract_page
+from fixture_site import FixtureSite, serve
+from tab_scraper import CONTENT_SELECTOR, TabScraper, chrome_options
+
+
+def child_pids(pid):
+    """All descendants of a process, from /proc."""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; ppid follows the closing paren
+                parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+    children, frontier = set(), [pid]
+    while frontier:
+        parent = frontier.pop()
+        for child, ppid in parents.items():
+            if ppid == parent and child not in children:
+                children.add(child)
+                frontier.append(child)
+    return children
+
+
+def rss_bytes(pids):
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+    return total
+
+
+class PeakRSS:
+    """Samples the summed RSS of every child process (chromedriver and Chrome) in the background."""
+
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.peak = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes(child_pids(os.getpid())))
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+
+def scrape_one_driver(url, settle):
+    """One browser per page, like scrape_document without the fixed Cloudflare wait."""
+    driver = webdriver.Chrome(options=chrome_options())
+    try:
+        driver.get(url)
+        WebDriverWait(driver, 30).until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, CONTENT_SELECTOR)))
+        time.sleep(settle)
+        return extract_page(driver.page_source)
+    finally:
+        driver.quit()
+
+
+def run_per_page(urls, concurrency, settle):
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(scrape_one_driver, url, settle) for url in urls]
+        return sum(1 for future in futures if future.exception() is None)
+
+
+def run_tabs(urls, concurrency, settle):
+    with TabScraper(tabs=concurrency, settle=settle) as scraper:
+        pages, _ = scraper.scrape(urls)
+        print(f"  {scraper.stats()}")
+    return len(pages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-tab scraping against one browser per page")
+    parser.add_argument("--pages", type=int, default=40, help="Number of fixture pages")
+    parser.add_argument("--concurrency", type=int, default=4, help="Tabs, or worker threads with their own browser")
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds the fixture server takes per response")
+    parser.add_argument("--settle", type=float, default=0.5, help="Seconds to wait after a page is ready")
+    args = parser.parse_args()
+
+    site = FixtureSite(args.pages, links_per_page=100, latency=args.latency)
+    server, base_url = serve(site)
+    urls = site.urls(base_url)
+    try:
+        for name, run in [("Tabs in one browser", run_tabs), ("One browser per page", run_per_page)]:
+            with PeakRSS() as rss:
+                start = time.perf_counter()
+                scraped = run(urls, args.concurrency, args.settle)
+                elapsed = time.perf_counter() - start
+            print(f"{name}: {scraped}/{len(urls)} pages in {elapsed:.1f}s "
+                  f"({scraped / elapsed:.2f} pages/s), peak browser RSS {rss.peak / 1e6:.0f}MB")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Local benchmark for the site-wide search index.
+Indexes synthetic doc pages with a Zipf-like vocabulary and reports
+indexing rate, related-page and keyword query latency, memory used by
+postings and save/load times. Needs no API key or network.
+
+Example:
+    python bench_search.py --docs 20000 --words 800
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from search_index import SearchIndex
+
+
+def make_documents(count, words, vocabulary=50000, seed=0):
+    rng = random.Random(seed)
+    terms = [f"term{n}" for n in range(vocabulary)]
+    # Zipf-like: a few very common words, a long tail of rare ones
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    documents = []
+    for n in range(count):
+        # Pages in the same section share a topic vocabulary
+        topic = terms[1000 + (n % 500) * 20:1000 + (n % 500) * 20 + 20]
+        body = rng.choices(terms, weights, k=words) + rng.choices(topic, k=words // 10)
+        rng.shuffle(body)
+        documents.append((f"https://docs.example.com/page/{n}", f"Page {n}\n" + " ".join(body)))
+    return documents
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the search index on synthetic pages")
+    parser.add_argument("--docs", type=int, default=20000, help="Number of synthetic pages")
+    parser.add_argument("--words", type=int, default=800, help="Words per page")
+    parser.add_argument("--queries", type=int, default=200, help="Queries of each kind")
+    args = parser.parse_args()
+
+    documents = make_documents(args.docs, args.words)
+    index = SearchIndex()
+    start = time.perf_counter()
+    for url, content in documents:
+        index.add(url, content)
+    elapsed = time.perf_counter() - start
+    print(f"Indexed {args.docs} pages in {elapsed:.2f}s ({args.docs / elapsed:.0f} pages/s)")
+    print(f"Index: {index.stats()}")
+
+    samples = random.sample(documents, min(args.queries, len(documents)))
+    latencies = []
+    for url, content in samples:
+        start = time.perf_counter()
+        index.related(content, url)
+        latencies.append((time.perf_counter() - start) * 1000)
+    print(f"Related pages: median {statistics.median(latencies):.2f}ms, p95 {percentile(latencies, 0.95):.2f}ms")
+
+    latencies = []
+    for _ in range(args.queries):
+        query = " ".join(f"term{random.randrange(1000, 11000)}" for _ in range(3))
+        start = time.perf_counter()
+        index.search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    print(f"Keyword search: median {statistics.median(latencies):.2f}ms, p95 {percentile(latencies, 0.95):.2f}ms")
+
+    # Re-scrape a tenth of the pages with changed content
+    start = time.perf_counter()
+    for url, content in documents[:args.docs // 10]:
+        index.add(url, content + " updated")
+    print(f"Re-indexed {args.docs // 10} changed pages in {time.perf_counter() - start:.2f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.bin")
+        start = time.perf_counter()
+        index.save(path)
+        saved = time.perf_counter() - start
+        start = time.perf_counter()
+        loaded = SearchIndex(path)
+        print(f"Saved {os.path.getsize(path) / 1e6:.1f}MB in {saved:.2f}s, "
+              f"loaded {loaded.stats()['documents']} pages in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Request deadlines and cancellation.
+A Deadline carries a request's time budget through scraping, analysis and
+revision, runs cancel callbacks (e.g. quitting the browser) when the budget
+expires or the client goes away, and records time spent per stage.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUDGET = 120.0  # seconds
+MAX_BUDGET = 600.0
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request runs out of budget or is cancelled."""
+
+
+class Deadline:
+    """Time budget and cancellation token for a single request."""
+
+    def __init__(self, budget=DEFAULT_BUDGET):
+        """
+        Args:
+            budget (float): Seconds the request may run for
+        """
+        self.budget = budget
+        self.started = time.monotonic()
+        self.expires = self.started + budget
+        self.reason = None
+        self.timings = {}
+        self.callbacks = []
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+        self.timer = threading.Timer(budget, self.cancel, ["deadline exceeded"])
+        self.timer.daemon = True
+        self.timer.start()
+
+    @classmethod
+    def from_header(cls, value, default=DEFAULT_BUDGET):
+        """Build a deadline from an X-Request-Timeout header value in seconds."""
+        try:
+            budget = float(value) if value else default
+        except ValueError:
+            budget = default
+        if not math.isfinite(budget):
+            budget = default
+        return cls(min(max(budget, 0.0), MAX_BUDGET))
+
+    def remaining(self):
+        """Seconds left in the budget (never negative)."""
+        return max(0.0, self.expires - time.monotonic())
+
+    def check(self):
+        """
+        Raise if the request should stop.
+
+        Raises:
+            DeadlineExceeded: If the budget expired or the request was cancelled
+        """
+        if not self.cancelled.is_set() and self.remaining() <= 0:
+            self.cancel("deadline exceeded")
+        if self.cancelled.is_set():
+            raise DeadlineExceeded(self.reason)
+
+    def sleep(self, seconds):
+        """Sleep for up to `seconds`, waking early and raising if cancelled."""
+        self.cancelled.wait(min(seconds, self.remaining()))
+        self.check()
+
+    def on_cancel(self, callback):
+        """
+        Register a callback to run on cancellation.
+
+        Returns:
+            callable: Unregisters the callback; call it once the work is done
+        """
+        with self.lock:
+            if not self.cancelled.is_set():
+                self.callbacks.append(callback)
+                return lambda: self._unregister(callback)
+        callback()
+        return lambda: None
+
+    def _unregister(self, callback):
+        with self.lock:
+            if callback in self.callbacks:
+                self.callbacks.remove(callback)
+
+    def cancel(self, reason="cancelled"):
+        """Cancel the request and run every registered callback once."""
+        with self.lock:
+            if self.cancelled.is_set():
+                return
+            self.reason = reason
+            self.cancelled.set()
+            callbacks, self.callbacks = self.callbacks, []
+        print(f"Cancelling request: {reason}")
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error in cancel callback: {e}")
+
+    def close(self):
+        """Stop the expiry timer once the request has finished."""
+        self.timer.cancel()
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as a named stage, checking the budget first."""
+        self.check()
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.monotonic() - start
+
+    def report(self):
+        """Return per-stage time against the budget, in milliseconds."""
+        return {
+            "budget_ms": round(self.budget * 1000),
+            "elapsed_ms": round((time.monotonic() - self.started) * 1000),
+            "stages_ms": {name: round(seconds * 1000) for name, seconds in self.timings.items()}
+        }
@@ -0,0 +1,159 @@
+"""
+Content extraction from rendered page HTML.
+Used by scrape_page on live pages and by snapshot replay on archived pages,
+so extraction changes can be tested offline.
+"""
+
+import re
+from html.parser import HTMLParser
+
+HEADING_TAGS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+CONTENT_TAGS = HEADING_TAGS + ['p', 'ul', 'ol', 'pre', 'code', 'tr', 'th']
+SKIP_TAGS = ['script', 'style', 'noscript', 'template', 'svg']
+# Tags whose boundaries break lines in the extracted text
+BLOCK_TAGS = HEADING_TAGS + ['p', 'div', 'li', 'tr', 'br', 'pre', 'table', 'section', 'article']
+CELL_TAGS = ['td', 'th']
+VOID_TAGS = ['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr']
+HIDDEN_MARKER = 'data-scraper-hidden'
+# Run in the browser before reading page_source, so elements hidden by
+# stylesheets are dropped too. visibility:hidden is left alone because
+# children can override it.
+MARK_HIDDEN_SCRIPT = f"""
+for (const element of document.body ? document.body.querySelectorAll('*') : []) {{
+    if (getComputedStyle(element).display === 'none') {{
+        element.setAttribute('{HIDDEN_MARKER}', '');
+    }}
+}}
+"""
+HIDDEN_STYLE_RE = re.compile(r"(?:^|;)\s*display\s*:\s*none", re.IGNORECASE)
+
+
+def is_hidden(attrs):
+    """
+    Whether an element is hidden by its own attributes.
+
+    WebDriver's element.text only returned rendered text; this covers the
+    hidden attribute, aria-hidden, inline display:none and
+    elements marked by MARK_HIDDEN_SCRIPT.
+    """
+    for name, value in attrs:
+        if name in ('hidden', HIDDEN_MARKER):
+            return True
+        if name == 'aria-hidden' and (value or '').strip().lower() == 'true':
+            return True
+        if name == 'style' and value and HIDDEN_STYLE_RE.search(value):
+            return True
+    return False
+
+
+class ContentParser(HTMLParser):
+    """Collect the text of every content element in document order, plus links and anchors."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.elements = []  # [tag, [text chunks]] in start-tag order
+        self.open_elements = []  # (tag, index into self.elements or None, hidden)
+        self.skip_depth = 0
+        self.hidden_depth = 0  # Hidden elements drop their text but keep their links
+        self.links = []  # href values of <a> elements, in document order
+        self.anchors = set()  # id/name values that a #fragment can point at
+
+    def handle_starttag(self, tag, attrs):
+        for name, value in attrs:
+            if value and (name == 'id' or (name == 'name' and tag == 'a')):
+                self.anchors.add(value)
+            elif name == 'href' and tag == 'a' and value and not self.skip_depth:
+                self.links.append(value.strip())
+        if tag in VOID_TAGS:
+            if tag == 'br':
+                self._append("\n")
+            return
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        hidden = is_hidden(attrs)
+        if hidden:
+            self.hidden_depth += 1
+        if tag in BLOCK_TAGS:
+            self._append("\n")
+        elif tag in CELL_TAGS:
+            self._append(" ")
+        index = None
+        if tag in CONTENT_TAGS and not self.skip_depth and not self.hidden_depth:
+            index = len(self.elements)
+            self.elements.append([tag, []])
+        self.open_elements.append((tag, index, hidden))
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        # Close up to the matching tag, tolerating unclosed children
+        for depth in range(len(self.open_elements) - 1, -1, -1):
+            if self.open_elements[depth][0] == tag:
+                for open_tag, _, hidden in self.open_elements[depth:]:
+                    if open_tag in SKIP_TAGS:
+                        self.skip_depth -= 1
+                    if hidden:
+                        self.hidden_depth -= 1
+                del self.open_elements[depth:]
+                break
+        if tag in BLOCK_TAGS:
+            self._append("\n")
+
+    def handle_data(self, data):
+        if not self.skip_depth and not self.hidden_depth:
+            self._append(data)
+
+    def _append(self, text):
+        for _, index, _ in self.open_elements:
+            if index is not None:
+                self.elements[index][1].append(text)
+
+
+def clean_text(text):
+    """Collapse whitespace the way rendered element text would."""
+    lines = [re.sub(r"[ \t\r\f\v\xa0]+", " ", line).strip() for line in text.split("\n")]
+    return "\n".join(line for line in lines if line)
+
+
+def extract_page(html):
+    """
+    Extract article text, link targets and anchor names from page HTML.
+
+    Args:
+        html (str): Rendered page source
+
+    Returns:
+        dict: "content" (see extract_content), "links" (raw href values)
+        and "anchors" (set of ids a fragment can point at)
+    """
+    parser = ContentParser()
+    parser.feed(html)
+    parser.close()
+
+    content_parts = []
+    for tag, chunks in parser.elements:
+        text = clean_text("".join(chunks))
+        if text:
+            if tag in HEADING_TAGS:
+                content_parts.append(f"\n{text}\n")
+            else:
+                content_parts.append(text)
+
+    return {
+        "content": "\n\n".join(content_parts),
+        "links": parser.links,
+        "anchors": parser.anchors
+    }
+
+
+def extract_content(html):
+    """
+    Extract structured article text from page HTML.
+
+    Args:
+        html (str): Rendered page source
+
+    Returns:
+        str: Extracted content, headings separated by blank lines
+    """
+    return extract_page(html)["content"]
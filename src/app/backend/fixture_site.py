@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Local fixture documentation site.
+Serves generated doc pages with good links, broken links, servers that
+refuse HEAD, missing anchors and optional latency, for link checker and
+scraper benchmarks. Needs no network access.
+
+Example:
+    python fixture_site.py --pages 50 --links 200 --port 8765
+"""
+
+import argparse
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FixtureSite:
+    """Generated pages, deterministic for a given seed."""
+
+    def __init__(self, pages=20, links_per_page=50, broken_rate=0.1, latency=0.0, seed=0):
+        """
+        Args:
+            pages (int): Number of doc pages
+            links_per_page (int): Links on every page
+            broken_rate (float): Share of links that should be reported broken
+            latency (float): Seconds each response is delayed
+            seed (int): Random seed for the page layout
+        """
+        self.pages = pages
+        self.latency = latency
+        rng = random.Random(seed)
+        self.expected_broken = {}
+        self.bodies = {}
+        for index in range(pages):
+            links, broken = [], []
+            for n in range(links_per_page):
+                target = rng.randrange(pages)
+                if rng.random() < broken_rate:
+                    href = rng.choice([f"/missing/{index}-{n}", f"/docs/{target}#no-such-section",
+                                       f"#no-such-section-{n}", "/status/500"])
+                    broken.append(href)
+                else:
+                    href = rng.choice([f"/docs/{target}", f"/docs/{target}#section-{n % 5}",
+                                       f"/head-refused/{target}", f"#section-{n % 5}",
+                                       f"/challenge/{target}"])
+                links.append(href)
+            self.expected_broken[f"/docs/{index}"] = set(broken)
+            self.bodies[f"/docs/{index}"] = self.render(index, links)
+
+    def render(self, index, links):
+        sections = "\n".join(
+            f'<h2 id="section-{n}">Section {n}</h2>\n<p>Text for section {n} of page {index}.</p>'
+            for n in range(5)
+        )
+        items = "\n".join(f'<li><a href="{href}">link {n}</a></li>' for n, href in enumerate(links))
+        return (f"<html><head><title>Page {index}</title></head><body><main>\n"
+                f"<h1>Page {index}</h1>\n{sections}\n<ul>\n{items}\n</ul>\n</main></body></html>")
+
+    def urls(self, base_url):
+        return [f"{base_url}/docs/{index}" for index in range(self.pages)]
+
+    def response(self, method, path):
+        """Return (status, body, extra headers) for a request."""
+        if self.latency:
+            time.sleep(self.latency)
+        if path.startswith("/challenge/"):
+            # What Cloudflare serves a client that can't run its JS check
+            return 403, "Just a moment...", {"cf-mitigated": "challenge"}
+        if path.startswith("/head-refused/"):
+            if method == "HEAD":
+                return 405, "", {}
+            path = "/docs/" + path.rsplit("/", 1)[1]
+        if path == "/status/500":
+            return 500, "error", {}
+        body = self.bodies.get(path)
+        if body is None:
+            return 404, "not found", {}
+        return 200, body, {}
+
+
+def make_handler(site):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; don't let Nagle hold the body back
+        disable_nagle_algorithm = True
+
+        def respond(self, method):
+            status, body, headers = site.response(method, self.path)
+            data = body.encode("utf-8")
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            if method == "GET":
+                self.wfile.write(data)
+
+        def do_GET(self):
+            self.respond("GET")
+
+        def do_HEAD(self):
+            self.respond("HEAD")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(site, port=0):
+    """
+    Serve a fixture site from a background thread.
+
+    Returns:
+        tuple: (server, base URL); call server.shutdown() when done
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(site))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a generated documentation site locally")
+    parser.add_argument("--pages", type=int, default=20, help="Number of doc pages")
+    parser.add_argument("--links", type=int, default=50, help="Links per page")
+    parser.add_argument("--broken-rate", type=float, default=0.1, help="Share of broken links")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    site = FixtureSite(args.pages, args.links, args.broken_rate, args.latency)
+    server, base_url = serve(site, args.port)
+    print(f"Serving {args.pages} pages at {base_url}/docs/0 .. /docs/{args.pages - 1}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Adaptive concurrency limiting for the scrape and LLM stages.
+Each stage gets an AIMD limit driven by observed latency and errors, a
+bounded wait queue with deadlines, and early load shedding when full.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Overloaded(Exception):
+    """Raised when a stage sheds a request instead of queueing it."""
+
+    def __init__(self, stage, retry_after):
+        super().__init__(f"{stage} is overloaded, retry in {retry_after}s")
+        self.stage = stage
+        self.retry_after = retry_after
+
+
+class Slot:
+    """
+    A held slot, yielded by AdaptiveLimiter.slot.
+
+    Work whose latency depends on what it did (which model tier answered,
+    how many calls a cascade made) sets latency_key, so it is judged
+    against earlier work of the same kind rather than the overall average.
+    """
+
+    def __init__(self, start):
+        self.start = start
+        self.latency_key = None
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter.
+
+    The limit grows by roughly one slot per round of successful requests and
+    shrinks multiplicatively on errors or when latency rises well above the
+    long-term average, which is the usual sign of a saturated browser pool
+    or a rate-limited model endpoint.
+    """
+
+    def __init__(self, name, initial_limit=4, min_limit=1, max_limit=32,
+                 backoff=0.75, tolerance=2.0, max_queue=16, queue_timeout=10.0,
+                 neutral_errors=()):
+        """
+        Args:
+            name (str): Stage name used in errors and stats
+            initial_limit (int): Starting concurrency limit
+            min_limit (int): Lower bound for the limit
+            max_limit (int): Upper bound for the limit
+            backoff (float): Multiplier applied to the limit on overload
+            tolerance (float): Latency above tolerance * average counts as overload
+            max_queue (int): Requests allowed to wait for a slot before shedding
+            queue_timeout (float): Longest time a request waits for a slot, in seconds
+            neutral_errors (tuple): Exception types that release the slot
+                without counting as success or failure
+        """
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.neutral_errors = neutral_errors
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.avg_latency = None
+        self.baselines = {}  # latency_key -> average unloaded latency
+        self.last_backoff = 0.0
+        self.counts = {"accepted": 0, "shed": 0, "timed_out": 0, "errors": 0}
+        self.condition = threading.Condition()
+
+    def retry_after(self):
+        """Estimate in whole seconds when a slot is likely to free up."""
+        latency = self.avg_latency or 1.0
+        rounds = (self.waiting + 1) / max(int(self.limit), 1)
+        return max(1, math.ceil(latency * rounds))
+
+    def check(self):
+        """
+        Shed a request up front if this stage's queue is already full.
+
+        Lets earlier stages refuse work that would be dropped here anyway.
+        """
+        with self.condition:
+            if self.in_flight >= int(self.limit) and self.waiting >= self.max_queue:
+                self.counts["shed"] += 1
+                raise Overloaded(self.name, self.retry_after())
+
+    def acquire(self, timeout=None):
+        """
+        Wait for a slot.
+
+        Args:
+            timeout (float): Longest wait in seconds, capped by queue_timeout
+
+        Returns:
+            float: Start time to pass back to release()
+
+        Raises:
+            Overloaded: If the queue is full or no slot frees up in time
+        """
+        wait = self.queue_timeout if timeout is None else min(timeout, self.queue_timeout)
+        with self.condition:
+            if self.in_flight >= int(self.limit):
+                if self.waiting >= self.max_queue or wait <= 0:
+                    self.counts["shed"] += 1
+                    raise Overloaded(self.name, self.retry_after())
+
+                deadline = time.monotonic() + wait
+                self.waiting += 1
+                try:
+                    while self.in_flight >= int(self.limit):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.counts["timed_out"] += 1
+                            raise Overloaded(self.name, self.retry_after())
+                        self.condition.wait(remaining)
+                finally:
+                    self.waiting -= 1
+
+            self.in_flight += 1
+            self.counts["accepted"] += 1
+        return time.monotonic()
+
+    def release(self, start, success=True, latency_key=None):
+        """
+        Free a slot and adjust the limit from the request's outcome.
+
+        A success of None frees the slot without adjusting anything. Latency
+        is compared with the average of earlier requests with the same
+        latency_key.
+        """
+        latency = time.monotonic() - start
+        with self.condition:
+            self.in_flight -= 1
+            if success is None:
+                self.condition.notify_all()
+                return
+            if not success:
+                self.counts["errors"] += 1
+
+            baseline = self.baselines.get(latency_key)
+            overloaded = not success or (baseline is not None and latency > self.tolerance * baseline)
+            now = time.monotonic()
+            if overloaded:
+                # Back off at most once per typical request so a burst of slow
+                # completions from the same episode doesn't collapse the limit
+                if now - self.last_backoff >= (self.avg_latency or 0):
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self.last_backoff = now
+            elif self.in_flight + 1 >= int(self.limit):
+                # Only grow when the current limit is actually being used
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+            # Slow samples are left out of the average so it keeps tracking
+            # unloaded latency, unless the limit can't shrink any further
+            if success and (not overloaded or self.limit <= self.min_limit):
+                self.baselines[latency_key] = latency if baseline is None else 0.9 * baseline + 0.1 * latency
+                if self.avg_latency is None:
+                    self.avg_latency = latency
+                else:
+                    self.avg_latency = 0.9 * self.avg_latency + 0.1 * latency
+            self.condition.notify_all()
+
+    @contextmanager
+    def slot(self, timeout=None):
+        """Run the enclosed block inside a concurrency slot; yields the Slot."""
+        slot = Slot(self.acquire(timeout))
+        success = False
+        try:
+            yield slot
+            success = True
+        except self.neutral_errors:
+            success = None
+            raise
+        finally:
+            self.release(slot.start, success, slot.latency_key)
+
+    def stats(self):
+        """Return the current limit, load and counters."""
+        with self.condition:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "avg_latency": round(self.avg_latency, 3) if self.avg_latency else None,
+                "baselines": {str(key): round(latency, 3) for key, latency in self.baselines.items()},
+                **self.counts
+            }
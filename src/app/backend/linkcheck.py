@@ -0,0 +1,252 @@
+"""
+Concurrent link and anchor checker.
+Validates the links found while scraping a page with a pooled async HTTP
+client: per-host concurrency limits, HEAD with GET fallback, fragment
+checks against the target page's ids, and a result cache shared by every
+page checked in the process.
+"""
+
+import asyncio
+import ssl
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urldefrag, urljoin, urlparse
+
+import httpx
+
+from extraction import extract_page
+
+SKIPPED_SCHEMES = ("mailto:", "tel:", "javascript:", "data:")
+# Servers that refuse HEAD often answer these instead of 200
+HEAD_FALLBACK_STATUSES = {403, 405, 501}
+# Answers that say the checker was refused rather than that the link is
+# broken: logins, bot protection (the docs sit behind Cloudflare, whose JS
+# challenge httpx can't run) and rate limits
+UNVERIFIABLE_STATUSES = {401, 403, 429}
+MAX_TOTAL_CONNECTIONS = 64
+MAX_PER_HOST = 6
+TIMEOUT = 10.0
+# Total time for one page's links; targets still pending are left unchecked
+CHECK_BUDGET = 15.0
+# How often a running check looks at its stop event
+STOP_POLL = 0.1
+CACHE_TTL = 3600.0
+# Entries kept by a LinkCache; the oldest-used are evicted first
+CACHE_MAX_ENTRIES = 20000
+
+# Loading the CA bundle takes tens of milliseconds, so share one context
+# across the per-page clients
+SSL_CONTEXT = ssl.create_default_context()
+
+
+class LinkCache:
+    """Thread-safe LRU cache of link check results keyed by URL without fragment."""
+
+    def __init__(self, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, url, need_anchors=False):
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                return None
+            if time.monotonic() - entry["checked_at"] > self.ttl:
+                del self.entries[url]
+                return None
+            self.entries.move_to_end(url)
+        # A HEAD result can't answer fragment checks; the page must be fetched
+        if need_anchors and entry["ok"] and entry["anchors"] is None:
+            return None
+        return entry
+
+    def put(self, url, entry):
+        entry["checked_at"] = time.monotonic()
+        with self.lock:
+            self.entries[url] = entry
+            self.entries.move_to_end(url)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+# Shared by every page checked in this process, so a crawl checks each
+# target once
+shared_cache = LinkCache()
+
+
+def normalize_links(links, page_url):
+    """
+    Resolve raw hrefs against the page URL.
+
+    Returns:
+        list: (href, absolute URL without fragment, fragment) for http(s) links
+    """
+    resolved = []
+    seen = set()
+    for href in links:
+        if not href or href.lower().startswith(SKIPPED_SCHEMES):
+            continue
+        try:
+            target, fragment = urldefrag(urljoin(page_url, href))
+            if urlparse(target).scheme not in ("http", "https"):
+                continue
+        except ValueError:
+            # Malformed hrefs such as "http://[::1" can't be resolved
+            continue
+        if (target, fragment) in seen:
+            continue
+        seen.add((target, fragment))
+        resolved.append((href, target, fragment))
+    return resolved
+
+
+def status_result(response, anchors):
+    """Result dict for an HTTP response; see fetch_status."""
+    unverified = (response.status_code in UNVERIFIABLE_STATUSES
+                  or response.headers.get("cf-mitigated") == "challenge")
+    return {"ok": response.status_code < 400, "unverified": unverified, "status": response.status_code,
+            "error": None, "anchors": anchors}
+
+
+async def fetch_status(client, url, need_anchors):
+    """
+    Check one URL, trying HEAD first unless the body is needed for anchors.
+
+    Returns:
+        dict: "ok", "unverified" (the server refused the checker, so the
+        link may be fine), "status", "error" and "anchors" (set, or None if
+        not fetched)
+    """
+    try:
+        if not need_anchors:
+            response = await client.head(url)
+            if response.status_code not in HEAD_FALLBACK_STATUSES:
+                return status_result(response, None)
+        response = await client.get(url)
+        anchors = None
+        if response.status_code < 400 and "html" in response.headers.get("content-type", ""):
+            anchors = extract_page(response.text)["anchors"]
+        return status_result(response, anchors)
+    except (httpx.HTTPError, httpx.InvalidURL, ValueError) as e:
+        # ValueError covers hosts that fail IDNA or ASCII encoding
+        return {"ok": False, "unverified": False, "status": None, "error": type(e).__name__, "anchors": None}
+
+
+
+async def check_links_async(links, page_url, page_anchors=(), cache=shared_cache,
+                            max_per_host=MAX_PER_HOST, timeout=TIMEOUT, budget=CHECK_BUDGET, stop=None):
+    """
+    Check every link on a page concurrently.
+
+    Args:
+        links (list): Raw href values from the page
+        page_url (str): URL the page was loaded from
+        page_anchors (set): Ids on the page itself, for same-page fragments
+        cache (LinkCache): Result cache shared across pages
+        max_per_host (int): Concurrent requests allowed per host
+        timeout (float): Per-request timeout in seconds
+        budget (float): Total seconds for the whole page
+        stop (threading.Event): Set from another thread to end the check
+            early and report what has finished; the rest is left unchecked
+
+    Returns:
+        dict: "checked" (number of links), "unchecked" (links whose target
+        didn't finish within the budget), "unverified" (links whose server
+        refused the checker) and "broken" (list of dicts with "url",
+        "target" and "reason")
+    """
+    resolved = normalize_links(links, page_url)
+    page_target = urldefrag(page_url)[0]
+
+    # Which external targets need their body fetched for fragment checks
+    targets = {}
+    for _, target, fragment in resolved:
+        if target != page_target:
+            targets[target] = targets.get(target, False) or bool(fragment)
+
+    results = {}
+    to_fetch = []
+    for target, need_anchors in targets.items():
+        cached = cache.get(target, need_anchors)
+        if cached is not None:
+            results[target] = cached
+        else:
+            to_fetch.append((target, need_anchors))
+
+    if to_fetch:
+        host_limits = {}
+        limits = httpx.Limits(max_connections=MAX_TOTAL_CONNECTIONS,
+                              max_keepalive_connections=MAX_TOTAL_CONNECTIONS)
+        async with httpx.AsyncClient(follow_redirects=True, timeout=timeout, limits=limits, verify=SSL_CONTEXT,
+                                     headers={"User-Agent": "ai-doc-analyzer-linkcheck"}) as client:
+            async def check(target, need_anchors):
+                host = urlparse(target).netloc
+                semaphore = host_limits.setdefault(host, asyncio.Semaphore(max_per_host))
+                async with semaphore:
+                    result = await fetch_status(client, target, need_anchors)
+                cache.put(target, result)
+                results[target] = result
+
+            pending = {asyncio.ensure_future(check(target, need)) for target, need in to_fetch}
+            expires = time.monotonic() + budget
+            while pending and time.monotonic() < expires and not (stop and stop.is_set()):
+                _, pending = await asyncio.wait(pending, timeout=min(expires - time.monotonic(), STOP_POLL))
+            if pending:
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                reason = "was stopped" if stop and stop.is_set() else "ran out of time"
+                print(f"Link check for {page_url} {reason}, {len(targets) - len(results)} targets unchecked")
+
+    broken = []
+    unchecked = 0
+    unverified = 0
+    for href, target, fragment in resolved:
+        if target == page_target:
+            if fragment and fragment not in page_anchors:
+                broken.append({"url": href, "target": target, "reason": f"missing anchor #{fragment}"})
+            continue
+        result = results.get(target)
+        if result is None:
+            unchecked += 1
+            continue
+        if result.get("unverified"):
+            unverified += 1
+            continue
+        if not result["ok"]:
+            reason = f"HTTP {result['status']}" if result["status"] else result["error"]
+            broken.append({"url": href, "target": target, "reason": reason})
+        elif fragment and result["anchors"] is not None and fragment not in result["anchors"]:
+            broken.append({"url": href, "target": target, "reason": f"missing anchor #{fragment}"})
+
+    return {"checked": len(resolved) - unchecked, "unchecked": unchecked, "unverified": unverified,
+            "broken": broken}
+
+
+def check_links(links, page_url, page_anchors=(), **kwargs):
+    """Synchronous wrapper around check_links_async for worker threads."""
+    return asyncio.run(check_links_async(links, page_url, page_anchors, **kwargs))
+
+
+def check_html_links(html, page_url, **kwargs):
+    """Extract links and anchors from page HTML and check them."""
+    page = extract_page(html)
+    return check_links(page["links"], page_url, page["anchors"], **kwargs)
+
+
+def link_issues(report):
+    """Turn a link report into completeness issues."""
+    return [f"Broken link: {item['url']} ({item['reason']})" for item in report["broken"]]
+
+
+def add_link_issues(analysis, report):
+    """Add broken links from a link report to the completeness category of an analysis."""
+    issues = link_issues(report)
+    if issues:
+        completeness = analysis["completeness"]
+        completeness["issues"].extend(issues)
+        completeness["suggestions"].append("Fix or remove the broken links and anchors listed in the issues")
+    return analysis
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Local load test for the adaptive concurrency limiters.
+Drives the scrape -> LLM pipeline with stubbed stages whose latency grows
+with concurrency, optionally injecting slowdowns, and compares the limited
+pipeline against unbounded admission. Requests queue for a slot for as long
+as their budget allows, as in api.py. Needs no browser or API key.
+
+Example:
+    python loadtest.py --rate 0.4 --duration 120 --slowdown llm:40:60:4
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from limits import AdaptiveLimiter, Overloaded
+
+
+class FakeStage:
+    """
+    Stub pipeline stage with a fixed capacity.
+
+    Latency is the base latency while in-flight work stays within capacity
+    and grows proportionally beyond it; past fail_at concurrent requests the
+    stage starts failing, like a box running out of memory or a rate-limited
+    API.
+    """
+
+    def __init__(self, name, base_latency, capacity, fail_at):
+        self.name = name
+        self.base_latency = base_latency
+        self.capacity = capacity
+        self.fail_at = fail_at
+        self.slowdowns = []  # (start, end, factor) relative to the test start
+        self.started = time.monotonic()
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def add_slowdown(self, start, end, factor):
+        self.slowdowns.append((start, end, factor))
+
+    def __call__(self):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            load = self.in_flight
+        try:
+            elapsed = time.monotonic() - self.started
+            factor = 1.0
+            for start, end, slowdown in self.slowdowns:
+                if start <= elapsed < end:
+                    factor *= slowdown
+            latency = self.base_latency * factor * max(1.0, load / self.capacity)
+            time.sleep(latency * random.uniform(0.8, 1.2))
+            if load > self.fail_at:
+                raise RuntimeError(f"{self.name} failed under load ({load} in flight)")
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(rate, duration, slowdowns, limited, scrape_latency=12.0, llm_latency=3.0, budget=120.0,
+        queue_timeout=None):
+    """
+    Run one load test and print a summary.
+
+    Args:
+        rate (float): Requests per second
+        duration (float): Test length in seconds
+        slowdowns (list): (stage, start, end, factor) tuples
+        limited (bool): Use adaptive limiters instead of unbounded admission
+        scrape_latency (float): Unloaded scrape time; real scrapes take 10-30s
+        llm_latency (float): Unloaded model call time
+        budget (float): Per-request deadline in seconds
+        queue_timeout (float): Fixed cap on queueing for a slot instead of
+            waiting as long as the budget allows
+    """
+    scrape = FakeStage("scrape", base_latency=scrape_latency, capacity=4, fail_at=12)
+    llm = FakeStage("llm", base_latency=llm_latency, capacity=8, fail_at=24)
+    stages = {"scrape": scrape, "llm": llm}
+    for stage, start, end, factor in slowdowns:
+        stages[stage].add_slowdown(start, end, factor)
+
+    # Same settings as api.py
+    wait_cap = queue_timeout or budget
+    scrape_limiter = AdaptiveLimiter("scrape", initial_limit=2, max_limit=8, max_queue=8, queue_timeout=wait_cap)
+    llm_limiter = AdaptiveLimiter("llm", initial_limit=4, max_limit=32, max_queue=32, queue_timeout=wait_cap)
+    scrape_seconds = scrape_latency * 1.25
+    llm_seconds = llm_latency * 1.25
+
+    results = {"ok": [], "shed": 0, "errors": 0, "late": 0}
+    results_lock = threading.Lock()
+
+    def handle_request():
+        start = time.monotonic()
+        try:
+            if limited:
+                expires = start + budget
+                llm_limiter.check()
+                with scrape_limiter.slot(expires - time.monotonic() - scrape_seconds):
+                    scrape()
+                with llm_limiter.slot(expires - time.monotonic() - llm_seconds):
+                    llm()
+            else:
+                scrape()
+                llm()
+            elapsed = time.monotonic() - start
+            with results_lock:
+                if elapsed > budget:
+                    results["late"] += 1
+                else:
+                    results["ok"].append(elapsed)
+        except Overloaded:
+            with results_lock:
+                results["shed"] += 1
+        except RuntimeError:
+            with results_lock:
+                results["errors"] += 1
+
+    threads = []
+    test_start = time.monotonic()
+    next_report = 5.0
+    while time.monotonic() - test_start < duration:
+        thread = threading.Thread(target=handle_request)
+        thread.start()
+        threads.append(thread)
+        time.sleep(random.expovariate(rate))
+
+        elapsed = time.monotonic() - test_start
+        if limited and elapsed >= next_report:
+            print(f"  t={elapsed:5.1f}s scrape={scrape_limiter.stats()} llm={llm_limiter.stats()}")
+            next_report += 5.0
+
+    for thread in threads:
+        thread.join()
+
+    total = len(threads)
+    ok = results["ok"]
+    print(f"\n{'Adaptive limits' if limited else 'Unbounded'}: {total} requests")
+    print(f"  completed: {len(ok)}  shed (503): {results['shed']}  failed: {results['errors']}  "
+          f"past budget: {results['late']}")
+    print(f"  latency p50: {percentile(ok, 0.5):.2f}s  p95: {percentile(ok, 0.95):.2f}s  "
+          f"p99: {percentile(ok, 0.99):.2f}s")
+    print(f"  peak in flight: scrape={scrape.peak} llm={llm.peak}")
+
+
+def parse_slowdown(value):
+    """Parse 'stage:start:end:factor' into a tuple."""
+    stage, start, end, factor = value.split(":")
+    if stage not in ("scrape", "llm"):
+        raise argparse.ArgumentTypeError("stage must be 'scrape' or 'llm'")
+    return stage, float(start), float(end), float(factor)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the adaptive concurrency limiters")
+    parser.add_argument("--rate", type=float, default=0.4, help="Requests per second")
+    parser.add_argument("--duration", type=float, default=120.0, help="Test length in seconds")
+    parser.add_argument("--scrape-latency", type=float, default=12.0, help="Unloaded scrape time in seconds")
+    parser.add_argument("--llm-latency", type=float, default=3.0, help="Unloaded model call time in seconds")
+    parser.add_argument("--budget", type=float, default=120.0, help="Per-request deadline in seconds")
+    parser.add_argument("--queue-timeout", type=float,
+                        help="Cap queueing for a slot at this many seconds instead of the remaining budget")
+    parser.add_argument("--slowdown", type=parse_slowdown, action="append", default=[],
+                        help="Inject a slowdown as stage:start:end:factor (repeatable)")
+    parser.add_argument("--compare", action="store_true",
+                        help="Also run the same load with unbounded admission")
+    args = parser.parse_args()
+
+    options = {"scrape_latency": args.scrape_latency, "llm_latency": args.llm_latency,
+               "budget": args.budget, "queue_timeout": args.queue_timeout}
+    run(args.rate, args.duration, args.slowdown, limited=True, **options)
+    if args.compare:
+        run(args.rate, args.duration, args.slowdown, limited=False, **options)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ Simple AI-Powered Documentation Improvement Agent
 Analyzes MoEngage documentation and suggests improvements.
 """
 
+import atexit
 import os
 import time
 import json
@@ -11,11 +12,21 @@ import sys
 from datetime import datetime
 from dotenv import load_dotenv
 from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import InvalidArgumentException, WebDriverException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import google.generativeai as genai
+from google.api_core.exceptions import BadRequest
+
+from extraction import MARK_HIDDEN_SCRIPT, extract_page
+from linkcheck import add_link_issues, check_links
+from patches import split_blocks, number_blocks, parse_edits, apply_edits, unified_diff
+from results_store import ResultsStore, SCORE_VALUES, make_record
+from routing import ModelRouter
+from search_index import SearchIndex, format_related
+from snapshots import SnapshotStore
+from tab_scraper import chrome_options
 
 # Load environment variables
 load_dotenv()
@@ -27,68 +38,260 @@ if not GEMINI_API_KEY:
 
 genai.configure(api_key=GEMINI_API_KEY)
 
+# Picks a Gemini tier per call; see routing.py for MODEL_TIERS
+model_router = ModelRouter(cascade=os.getenv("MODEL_CASCADE", "1") != "0")
+
+# Optional archive of rendered page HTML for offline replay (see snapshots.py)
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR")
+snapshot_store = SnapshotStore(SNAPSHOT_DIR) if SNAPSHOT_DIR else None
+
+# Analysis history, replacing the old analysis_<timestamp>.json files
+RESULTS_DB = os.getenv("RESULTS_DB", "results.db")
+results_store = ResultsStore(RESULTS_DB)
+# Rows queued by background saves are written before the process exits
+atexit.register(results_store.flush)
+
+# Every scraped page, for pointing the analysis at related articles
+SEARCH_INDEX = os.getenv("SEARCH_INDEX", "search_index.bin")
+search_index = SearchIndex(SEARCH_INDEX)
+atexit.register(search_index.flush)
+
+CATEGORIES = ["readability", "structure", "completeness", "style_guidelines"]
+VALID_SCORES = ["Excellent", "Good", "Fair", "Poor"]
+# Patch revisions with at least this many rejected edits, making up more
+# than this share of all edits, escalate to the next model tier
+MIN_REJECTED_EDITS = 2
+MAX_REJECTED_RATIO = 0.25
 
-def scrape_page(url):
+
+class PageError(ValueError):
     """
-    Scrape content from a documentation page.
+    The page itself can't be scraped: a malformed or unreachable URL, or a
+    page without content. Says nothing about the health of the browser pool.
+    """
+
+
+# Failures caused by the request rather than the stage handling it: pages
+# that can't be scraped, model output that never passed validation and
+# prompts the model API rejects
+INPUT_ERRORS = (ValueError, BadRequest)
+
+
+def scrape_document(url, deadline=None):
+    """
+    Scrape a documentation page, keeping its links and anchors.
     
     Args:
         url (str): URL to scrape
+        deadline (Deadline): Optional request budget; the browser is killed
+            if it expires or the request is cancelled
         
     Returns:
-        str: Extracted content
+        dict: "content" (extracted text), "links" (raw hrefs) and
+        "anchors" (element ids on the page)
     """
-    options = Options()
-    options.add_argument('--headless')
-    options.add_argument('--disable-gpu')
-    options.add_argument('--window-size=1920,1080')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-    
-    driver = webdriver.Chrome(options=options)
+    if deadline:
+        deadline.check()
+    driver = webdriver.Chrome(options=chrome_options())
+    # Quitting from the cancelling thread aborts any in-flight navigation
+    unregister = deadline.on_cancel(driver.quit) if deadline else None
     
     try:
         print(f"Scraping content from: {url}")
+        if deadline:
+            driver.set_page_load_timeout(max(deadline.remaining(), 1))
         driver.get(url)
-        time.sleep(10)  # Wait for page load and Cloudflare
+        
+        # Wait for page load and Cloudflare
+        if deadline:
+            deadline.sleep(10)
+        else:
+            time.sleep(10)
         
         # Wait for content to load
-        wait = WebDriverWait(driver, 20)
+        wait = WebDriverWait(driver, min(20, deadline.remaining()) if deadline else 20)
         
-        # Get all content elements
-        elements = wait.until(EC.presence_of_all_elements_located(
+        # Wait for content elements to render
+        wait.until(EC.presence_of_all_elements_located(
             (By.CSS_SELECTOR, "h1, h2, h3, h4, h5, h6, p, ul, ol, pre, code, tr, th")
         ))
         
-        # Extract and structure content
-        content_parts = []
-        for element in elements:
-            text = element.text.strip()
-            if text:
-                tag = element.tag_name.lower()
-                if tag in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-                    content_parts.append(f"\n{text}\n")
-                else:
-                    content_parts.append(text)
+        # Extract and structure content from the rendered DOM
+        driver.execute_script(MARK_HIDDEN_SCRIPT)
+        html = driver.page_source
+        if snapshot_store:
+            snapshot_store.save(url, html)
+        page = extract_page(html)
         
-        content = "\n\n".join(content_parts)
+        if not page["content"].strip():
+            raise PageError("No content found on the page")
+        search_index.add(url, page["content"])
+        search_index.save_if_due()
         
-        if not content.strip():
-            raise Exception("No content found on the page")
-        
-        print(f"Successfully extracted {len(content)} characters")
-        return content
+        print(f"Successfully extracted {len(page['content'])} characters and {len(page['links'])} links")
+        return page
         
     except Exception as e:
         print(f"Error scraping page: {e}")
+        # Report WebDriver errors caused by a cancelled driver as such
+        if deadline:
+            deadline.check()
+        # Chrome reports DNS failures, refused connections and the like as
+        # net::ERR_ codes, and malformed URLs as invalid arguments
+        if isinstance(e, InvalidArgumentException) or (
+                isinstance(e, WebDriverException) and "net::ERR_" in (e.msg or "")):
+            raise PageError(f"Could not load {url}: {e.msg}") from e
         raise
     finally:
-        driver.quit()
+        if unregister:
+            unregister()
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+def scrape_page(url, deadline=None):
+    """
+    Scrape content from a documentation page.
+    
+    Args:
+        url (str): URL to scrape
+        deadline (Deadline): Optional request budget
+        
+    Returns:
+        str: Extracted content
+    """
+    return scrape_document(url, deadline)["content"]
+
+
+def generate_content(model, prompt, deadline=None):
+    """
+    Call Gemini, bounding the call by the request's remaining budget.
+
+    The client has no way to abort a call in progress, so the request
+    timeout is what stops a cancelled request from waiting on the model.
+    """
+    if deadline is None:
+        return model.generate_content(prompt)
+    deadline.check()
+    try:
+        # A little past the deadline so its timer has fired by the time the
+        # client gives up
+        timeout = max(deadline.remaining(), 1) + 0.1
+        response = model.generate_content(prompt, request_options={"timeout": timeout})
+    except Exception:
+        # A call cut off by the request timeout raises the client's own
+        # timeout error; report it as the deadline it was
+        deadline.check()
+        raise
+    deadline.check()
+    return response
+
 
+def call_model(prompt, deadline=None):
+    """Return a call(model_name) function for ModelRouter.run that sends this prompt."""
+    def call(model_name):
+        return generate_content(genai.GenerativeModel(model_name), prompt, deadline).text
+    return call
 
-def analyze_with_gemini(content, url):
+
+def strip_code_fence(text):
+    """Remove a surrounding ``` / ```json fence from a model response."""
+    text = text.strip()
+    if text.startswith('```json'):
+        text = text[7:-3]
+    elif text.startswith('```'):
+        text = text[3:-3]
+    return text.strip()
+
+
+def format_suggestions(analysis):
+    """Convert analysis issues and suggestions to readable text for a prompt."""
+    suggestions_text = ""
+    for category, data in analysis.items():
+        suggestions_text += f"\n{category.title()} Issues:\n"
+        if isinstance(data, dict):
+            issues = data.get('issues', [])
+            suggestions = data.get('suggestions', [])
+        else:
+            # Handle Pydantic model
+            issues = data.issues
+            suggestions = data.suggestions
+            
+        for issue in issues:
+            suggestions_text += f"- {issue}\n"
+        suggestions_text += f"{category.title()} Suggestions:\n"
+        for suggestion in suggestions:
+            suggestions_text += f"- {suggestion}\n"
+    return suggestions_text
+
+
+def validate_analysis(analysis):
+    """
+    Validate and normalize a parsed analysis dict in place.
+
+    Raises:
+        ValueError: If the analysis is not a dict or a category is missing
+    """
+    if not isinstance(analysis, dict):
+        raise ValueError("Analysis must be a JSON object")
+    for key in CATEGORIES:
+        if not isinstance(analysis.get(key), dict):
+            raise ValueError(f"Missing required category: {key}")
+        category = analysis[key]
+        if "score" not in category or category["score"] not in VALID_SCORES:
+            category["score"] = "Fair"  # Default if invalid
+        if "issues" not in category or not isinstance(category["issues"], list):
+            category["issues"] = []
+        if "suggestions" not in category or not isinstance(category["suggestions"], list):
+            category["suggestions"] = []
+    return analysis
+
+
+def is_confident_analysis(analysis):
+    """
+    Check a raw (not yet validated) analysis for signs of a weak answer.
+
+    An answer is low-confidence if any field had to be repaired, or if a
+    category is scored below Excellent without naming a single issue.
+    """
+    if not isinstance(analysis, dict):
+        return False
+    for key in CATEGORIES:
+        category = analysis.get(key)
+        if not isinstance(category, dict) or category.get("score") not in VALID_SCORES:
+            return False
+        if not isinstance(category.get("issues"), list) or not isinstance(category.get("suggestions"), list):
+            return False
+        if category["score"] != "Excellent" and not category["issues"]:
+            return False
+    return True
+
+
+def default_analysis():
+    """Return a valid placeholder analysis for when the model response is unusable."""
+    return {
+        cat: {
+            "score": "Fair",
+            "issues": ["Analysis failed to generate proper response"],
+            "suggestions": ["Please try again"]
+        } for cat in CATEGORIES
+    }
+
+
+def analyze_with_gemini(content, url, deadline=None, previous_score=None):
     """Analyze content using Gemini AI and return structured results."""
-    model = genai.GenerativeModel("gemini-2.0-flash")
+    if previous_score is None:
+        previous = results_store.latest(url)
+        previous_score = previous["overall_score"] if previous else None
+    
+    related = search_index.related(content, url)
+    related_text = f"""
+Related articles already on the site (when a missing topic is covered by one of
+these, suggest linking to it rather than adding the material):
+{format_related(related)}
+""" if related else ""
     
     prompt = f"""
 Analyze this MoEngage documentation article and provide structured feedback.
@@ -118,7 +321,7 @@ Return only the JSON in exactly this format, with these exact keys and value typ
 
 Article URL: {url}
 Content: {content}
-
+{related_text}
 Remember:
 1. Return ONLY the JSON object
 2. Scores must be exactly one of: Excellent, Good, Fair, Poor
@@ -126,72 +329,30 @@ Remember:
 4. Use the exact category names shown above
 """
 
+    def validate(response_text):
+        # Clean up response and validate JSON structure before returning
+        analysis = json.loads(strip_code_fence(response_text))
+        confident = is_confident_analysis(analysis)
+        return validate_analysis(analysis), confident
+
     try:
         print("Analyzing content with Gemini...")
-        response = model.generate_content(prompt)
-        
-        # Clean up response
-        analysis_text = response.text.strip()
-        if analysis_text.startswith('```json'):
-            analysis_text = analysis_text[7:-3]
-        elif analysis_text.startswith('```'):
-            analysis_text = analysis_text[3:-3]
-            
-        # Validate JSON structure before returning
-        analysis = json.loads(analysis_text)
-        required_keys = ["readability", "structure", "completeness", "style_guidelines"]
-        valid_scores = ["Excellent", "Good", "Fair", "Poor"]
-        
-        # Validate structure
-        for key in required_keys:
-            if key not in analysis:
-                raise ValueError(f"Missing required category: {key}")
-            category = analysis[key]
-            if "score" not in category or category["score"] not in valid_scores:
-                category["score"] = "Fair"  # Default if invalid
-            if "issues" not in category or not isinstance(category["issues"], list):
-                category["issues"] = []
-            if "suggestions" not in category or not isinstance(category["suggestions"], list):
-                category["suggestions"] = []
-                
-        return analysis
+        return model_router.run("analysis", content, call_model(prompt, deadline), validate, previous_score)
         
     except json.JSONDecodeError as e:
         print(f"Error parsing AI response: {e}")
         # Return a valid default structure
-        return {
-            cat: {
-                "score": "Fair",
-                "issues": ["Analysis failed to generate proper response"],
-                "suggestions": ["Please try again"]
-            } for cat in required_keys
-        }
+        return default_analysis()
     except Exception as e:
         print(f"Error during analysis: {e}")
         raise
 
 
-def revise_article_with_gemini(original_content, analysis):
+def revise_article_with_gemini(original_content, analysis, deadline=None):
     """Revise the article based on analysis suggestions."""
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    
+
     # Convert analysis to readable format for the prompt
-    suggestions_text = ""
-    for category, data in analysis.items():
-        suggestions_text += f"\n{category.title()} Issues:\n"
-        if isinstance(data, dict):
-            issues = data.get('issues', [])
-            suggestions = data.get('suggestions', [])
-        else:
-            # Handle Pydantic model
-            issues = data.issues
-            suggestions = data.suggestions
-            
-        for issue in issues:
-            suggestions_text += f"- {issue}\n"
-        suggestions_text += f"{category.title()} Suggestions:\n"
-        for suggestion in suggestions:
-            suggestions_text += f"- {suggestion}\n"
+    suggestions_text = format_suggestions(analysis)
     
     prompt = f"""
 Revise this MoEngage documentation article based on the analysis feedback.
@@ -213,10 +374,19 @@ Improvements to Apply:
 Return the revised article content only.
 """
 
+    def validate(response_text):
+        revised_content = response_text.strip()
+        if not revised_content:
+            raise ValueError("Empty revision")
+        # A much shorter rewrite usually means the model truncated or summarized
+        return revised_content, len(revised_content) >= 0.5 * len(original_content)
+
     try:
         print("Generating revised content...")
-        response = model.generate_content(prompt)
-        revised_content = response.text.strip()
+        revised_content = model_router.run(
+            "revision", original_content, call_model(prompt, deadline), validate,
+            calculate_overall_score(analysis)
+        )
         print("Revision completed successfully")
         return revised_content
         
@@ -225,15 +395,97 @@ Return the revised article content only.
         raise
 
 
+def revise_article_with_patches(original_content, analysis, deadline=None):
+    """
+    Revise the article by asking for targeted edits instead of a full rewrite.
+
+    The model only emits edits for the blocks that need changes, so output
+    size scales with the amount of change rather than the article length.
+    Falls back to a full revision if the edits cannot be parsed.
+
+    Returns:
+        dict: revised content, unified diff, and applied/rejected edits
+    """
+    blocks = split_blocks(original_content)
+    suggestions_text = format_suggestions(analysis)
+    
+    prompt = f"""
+Revise this MoEngage documentation article based on the analysis feedback.
+Each block of the article is prefixed with its id, like [p3].
+
+Guidelines:
+- Improve readability for non-technical marketers
+- Simplify complex sentences and jargon
+- Make tone more customer-focused and friendly
+- Improve structure and flow
+- Keep all technical information accurate
+- Don't add new technical details
+
+Article Blocks:
+{number_blocks(blocks)}
+
+Improvements to Apply:
+{suggestions_text}
+
+Return ONLY a JSON list of edits for the blocks that need to change:
+[
+  {{"op": "replace", "id": "p2", "text": "new block text"}},
+  {{"op": "insert_after", "id": "p4", "text": "new block text"}},
+  {{"op": "delete", "id": "p7"}}
+]
+
+Remember:
+1. Only include blocks that actually change
+2. "op" must be exactly one of: replace, insert_after, delete
+3. Do not include the [pN] prefix in "text"
+"""
+
+    def validate(response_text):
+        edits = parse_edits(strip_code_fence(response_text))
+        revised_blocks, applied, rejected = apply_edits(blocks, edits)
+        # Many edits pointing at unknown or conflicting blocks means the
+        # model lost track of the block ids; a single stray edit doesn't
+        confident = (len(rejected) < MIN_REJECTED_EDITS
+                     or len(rejected) <= MAX_REJECTED_RATIO * len(edits))
+        return (revised_blocks, applied, rejected), confident
+
+    try:
+        print("Generating revision edits...")
+        revised_blocks, applied, rejected = model_router.run(
+            "revision", original_content, call_model(prompt, deadline), validate,
+            calculate_overall_score(analysis)
+        )
+    except (json.JSONDecodeError, ValueError) as e:
+        print(f"Error parsing revision edits: {e}, falling back to full revision")
+        revised_content = revise_article_with_gemini(original_content, analysis, deadline)
+        return {
+            "revised": revised_content,
+            "diff": unified_diff(original_content, revised_content),
+            "applied": [],
+            "rejected": []
+        }
+    except Exception as e:
+        print(f"Error during revision: {e}")
+        raise
+
+    revised_content = "\n\n".join(revised_blocks)
+    print(f"Applied {len(applied)} edits ({len(rejected)} rejected)")
+    return {
+        "revised": revised_content,
+        "diff": unified_diff("\n\n".join(blocks), revised_content),
+        "applied": applied,
+        "rejected": rejected
+    }
+
+
 def calculate_overall_score(analysis):
     """Calculate overall score from individual category scores."""
     scores = []
-    score_values = {'Excellent': 4, 'Good': 3, 'Fair': 2, 'Poor': 1}
     
     for category_data in analysis.values():
         score = category_data.get('score', 'Fair')
-        if score in score_values:
-            scores.append(score_values[score])
+        if score in SCORE_VALUES:
+            scores.append(SCORE_VALUES[score])
     
     if not scores:
         return "Unknown"
@@ -289,30 +541,23 @@ def print_results(url, analysis, revised_content=None):
         print(revised_content)
 
 
-def save_results(url, analysis, revised_content=None):
-    """Save results to files."""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    # Save analysis as JSON
-    result_data = {
-        "url": url,
-        "timestamp": datetime.now().isoformat(),
-        "overall_score": calculate_overall_score(analysis),
-        "analysis": analysis
-    }
-    
-    json_file = f"analysis_{timestamp}.json"
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(result_data, f, indent=2, ensure_ascii=False)
-    
-    print(f"\nAnalysis saved to: {json_file}")
-    
-    # Save revised content if available
-    if revised_content:
-        content_file = f"revised_content_{timestamp}.txt"
-        with open(content_file, 'w', encoding='utf-8') as f:
-            f.write(revised_content)
-        print(f"Revised content saved to: {content_file}")
+def save_results(url, analysis, revised_content=None, content=None, background=False):
+    """
+    Save results to the results store.
+
+    Args:
+        url (str): Analyzed URL
+        analysis (dict): Analysis results
+        revised_content (str): Revised article, if generated
+        content (str): Scraped content, stored as a hash to spot page changes
+        background (bool): Queue the write instead of waiting for it
+    """
+    record = make_record(url, analysis, calculate_overall_score(analysis), content, revised_content)
+    if background:
+        results_store.submit(record)
+    else:
+        results_store.insert(record)
+        print(f"\nResults saved to: {RESULTS_DB}")
 
 
 def main():
@@ -336,17 +581,25 @@ def main():
         print("This may take a few minutes...\n")
         
         # Step 1: Scrape content
-        content = scrape_page(url)
+        page = scrape_document(url)
+        content = page["content"]
         
-        # Step 2: Analyze content
+        # Step 2: Analyze content and check its links
         analysis = analyze_with_gemini(content, url)
+        try:
+            link_report = check_links(page["links"], url, page["anchors"])
+            print(f"Checked {link_report['checked']} links, {len(link_report['broken'])} broken, "
+                  f"{link_report['unverified']} unverified")
+            add_link_issues(analysis, link_report)
+        except Exception as e:
+            print(f"Error checking links: {e}")
         
         # Step 3: Generate revised content
         revised_content = revise_article_with_gemini(content, analysis)
         
         # Step 4: Display and save results
         print_results(url, analysis, revised_content)
-        save_results(url, analysis, revised_content)
+        save_results(url, analysis, revised_content, content)
         
         print("\n" + "="*60)
         print("ANALYSIS COMPLETED SUCCESSFULLY!")
@@ -0,0 +1,107 @@
+"""
+Patch-based revision helpers.
+Numbers the blocks of a scraped article, applies targeted edits returned by
+the model and renders a unified diff of the result.
+"""
+
+import difflib
+import json
+
+VALID_OPS = ["replace", "insert_after", "delete"]
+
+
+def split_blocks(content):
+    """Split scraped content into paragraph/heading blocks."""
+    return [block.strip() for block in content.split("\n\n") if block.strip()]
+
+
+def number_blocks(blocks):
+    """Render blocks with stable ids (p1, p2, ...) for the revision prompt."""
+    return "\n\n".join(f"[p{i}] {block}" for i, block in enumerate(blocks, 1))
+
+
+def parse_edits(edits_text):
+    """
+    Parse the model's edit list.
+
+    Accepts either a bare JSON list or an object with an "edits" key.
+
+    Raises:
+        ValueError: If the text is not a list of edit objects
+    """
+    data = json.loads(edits_text)
+    if isinstance(data, dict):
+        data = data.get("edits")
+    if not isinstance(data, list):
+        raise ValueError("Edits must be a JSON list")
+    return [edit for edit in data if isinstance(edit, dict)]
+
+
+def apply_edits(blocks, edits):
+    """
+    Validate edits against the numbered blocks and apply them.
+
+    Each edit looks like {"op": "replace", "id": "p3", "text": "..."}.
+    Edits with an unknown op or id, missing text, or a second edit on a
+    block that was already replaced/deleted are rejected rather than applied.
+    Inserting after a deleted block is allowed and puts the new text where
+    the block was.
+
+    Args:
+        blocks (list): Original blocks as returned by split_blocks
+        edits (list): Edit dicts as returned by parse_edits
+
+    Returns:
+        tuple: (revised_blocks, applied_edits, rejected_edits)
+    """
+    replaced = {}
+    deleted = set()
+    inserted = {}
+    applied = []
+    rejected = []
+
+    for edit in edits:
+        op = edit.get("op")
+        block_id = str(edit.get("id", ""))
+        text = edit.get("text")
+
+        index = None
+        if block_id.startswith("p") and block_id[1:].isdigit():
+            index = int(block_id[1:]) - 1
+        if op not in VALID_OPS or index is None or not 0 <= index < len(blocks):
+            rejected.append(edit)
+            continue
+        if op != "delete" and (not isinstance(text, str) or not text.strip()):
+            rejected.append(edit)
+            continue
+
+        if op == "insert_after":
+            inserted.setdefault(index, []).append(text.strip())
+        elif index in replaced or index in deleted:
+            rejected.append(edit)
+            continue
+        elif op == "replace":
+            replaced[index] = text.strip()
+        else:
+            deleted.add(index)
+        applied.append(edit)
+
+    revised_blocks = []
+    for i, block in enumerate(blocks):
+        if i not in deleted:
+            revised_blocks.append(replaced.get(i, block))
+        revised_blocks.extend(inserted.get(i, []))
+
+    return revised_blocks, applied, rejected
+
+
+def unified_diff(original_content, revised_content):
+    """Return a unified diff between the original and revised article."""
+    diff = difflib.unified_diff(
+        original_content.splitlines(),
+        revised_content.splitlines(),
+        fromfile="original",
+        tofile="revised",
+        lineterm=""
+    )
+    return "\n".join(diff)
@@ -0,0 +1,121 @@
+"""
+On-demand sampling profiler.
+Samples Python stacks of selected threads (or the whole process) and
+renders them in the collapsed-stack format read by flamegraph.pl,
+speedscope and similar tools. Nothing runs unless a profile is requested.
+"""
+
+import os
+import sys
+import threading
+import uuid
+from collections import Counter, OrderedDict
+
+DEFAULT_INTERVAL = 0.005  # seconds between samples
+MAX_STORED_PROFILES = 20
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Background thread that periodically samples thread stacks."""
+
+    def __init__(self, interval=DEFAULT_INTERVAL, all_threads=False):
+        """
+        Args:
+            interval (float): Seconds between samples
+            all_threads (bool): Sample every thread instead of tracked ones only
+        """
+        self.id = uuid.uuid4().hex[:12]
+        self.interval = interval
+        self.all_threads = all_threads
+        self.thread_ids = set()
+        self.counts = Counter()
+        self.samples = 0
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"profiler-{self.id}", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def track(self, func):
+        """Wrap func so the thread running it is sampled while it runs."""
+        def tracked(*args, **kwargs):
+            ident = threading.get_ident()
+            with self.lock:
+                self.thread_ids.add(ident)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.thread_ids.discard(ident)
+        return tracked
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            self.sample(skip=own_ident)
+
+    def sample(self, skip=None):
+        """Record the current stack of every selected thread once."""
+        with self.lock:
+            selected = None if self.all_threads else set(self.thread_ids)
+        if selected is not None and not selected:
+            return
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+        for ident, frame in sys._current_frames().items():
+            if ident == skip or (selected is not None and ident not in selected):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.counts[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def collapsed(self):
+        """Return the samples as collapsed stacks, one "frame;frame;... count" per line."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.counts.most_common()) + "\n"
+
+
+class ProfileStore:
+    """Keeps the most recent finished profiles for download."""
+
+    def __init__(self, max_profiles=MAX_STORED_PROFILES):
+        self.max_profiles = max_profiles
+        self.profiles = OrderedDict()
+        self.lock = threading.Lock()
+
+    def add(self, sampler):
+        with self.lock:
+            self.profiles[sampler.id] = sampler.collapsed()
+            while len(self.profiles) > self.max_profiles:
+                self.profiles.popitem(last=False)
+
+    def ids(self):
+        with self.lock:
+            return list(reversed(self.profiles))
+
+    def get(self, profile_id):
+        with self.lock:
+            return self.profiles.get(profile_id)
+
+
+def profile_process(seconds, interval=DEFAULT_INTERVAL):
+    """Sample every thread of the live process for `seconds` and return collapsed stacks."""
+    sampler = StackSampler(interval=interval, all_threads=True).start()
+    sampler.stopped.wait(seconds)
+    sampler.stop()
+    return sampler.collapsed()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Site-wide score reports.
+Loads stored results into columnar numpy arrays and computes score
+distributions, worst pages and trends with vectorized operations, with
+CSV/Parquet export of the per-page table.
+"""
+
+import argparse
+import csv
+import io
+import time
+
+import numpy as np
+
+from results_store import ResultsStore, SCORE_COLUMNS, SCORE_VALUES
+
+SCORE_NAMES = sorted(SCORE_VALUES, key=SCORE_VALUES.get)  # Poor .. Excellent
+PERIODS = {"day": 86400, "week": 7 * 86400}
+# Buckets are UTC; weeks start on Monday (the epoch fell on a Thursday)
+PERIOD_OFFSETS = {"day": 0, "week": 4 * 86400}
+
+
+def load_scores(store, since=None):
+    """
+    Load stored results as columns.
+
+    Returns:
+        dict: "urls" (unique URLs), "url_codes" (int index into urls per
+        result), "created_at" (float seconds) and "scores" (float array of
+        shape (results, categories), NaN where a score is missing)
+    """
+    rows = store.score_rows(since=since)
+    if not rows:
+        return {
+            "urls": np.array([], dtype=object),
+            "url_codes": np.array([], dtype=np.int64),
+            "created_at": np.array([], dtype=np.float64),
+            "scores": np.empty((0, len(SCORE_COLUMNS)), dtype=np.float64)
+        }
+
+    columns = list(zip(*rows))
+    urls, url_codes = np.unique(np.array(columns[0], dtype=object), return_inverse=True)
+    return {
+        "urls": urls,
+        "url_codes": url_codes,
+        "created_at": np.array(columns[1], dtype=np.float64),
+        "scores": np.array(columns[2:], dtype=np.float64).T
+    }
+
+
+def latest_per_url(data):
+    """Return the row index of the newest result for each URL."""
+    if not len(data["url_codes"]):
+        return np.array([], dtype=np.int64)
+    order = np.lexsort((data["created_at"], data["url_codes"]))
+    codes = data["url_codes"][order]
+    is_last = np.r_[codes[1:] != codes[:-1], True]
+    return order[is_last]
+
+
+def mean_scores(scores):
+    """Mean category score per row, ignoring missing categories."""
+    counts = np.sum(~np.isnan(scores), axis=1)
+    totals = np.nansum(scores, axis=1)
+    return np.divide(totals, counts, out=np.full(len(scores), np.nan), where=counts > 0)
+
+
+def distributions(scores):
+    """Count of each score value per category."""
+    result = {}
+    for i, category in enumerate(SCORE_COLUMNS):
+        column = scores[:, i]
+        values = column[~np.isnan(column)].astype(np.int64)
+        counts = np.bincount(values, minlength=len(SCORE_NAMES) + 1)[1:len(SCORE_NAMES) + 1]
+        result[category] = dict(zip(SCORE_NAMES, counts.tolist()))
+    return result
+
+
+def trends(data, period="day"):
+    """Mean score per category and result count for each time bucket."""
+    if not len(data["created_at"]):
+        return []
+    seconds = PERIODS[period]
+    offset = PERIOD_OFFSETS[period]
+    buckets = np.floor((data["created_at"] - offset) / seconds).astype(np.int64)
+    bucket_ids, bucket_index = np.unique(buckets, return_inverse=True)
+
+    counts = np.bincount(bucket_index, minlength=len(bucket_ids))
+    category_means = {}
+    for i, category in enumerate(SCORE_COLUMNS):
+        column = data["scores"][:, i]
+        valid = ~np.isnan(column)
+        totals = np.bincount(bucket_index[valid], weights=column[valid], minlength=len(bucket_ids))
+        valid_counts = np.bincount(bucket_index[valid], minlength=len(bucket_ids))
+        means = np.divide(totals, valid_counts, out=np.full(len(bucket_ids), np.nan), where=valid_counts > 0)
+        category_means[category] = np.round(means, 3)
+
+    return [
+        {
+            "period_start": time.strftime("%Y-%m-%d", time.gmtime(int(bucket) * seconds + offset)),
+            "results": int(counts[j]),
+            **{category: _float_or_none(category_means[category][j]) for category in SCORE_COLUMNS}
+        }
+        for j, bucket in enumerate(bucket_ids)
+    ]
+
+
+def page_table(data):
+    """Columns for the newest result of every URL, worst mean score first."""
+    latest = latest_per_url(data)
+    means = mean_scores(data["scores"][latest])
+    # NaN means sort last
+    order = np.argsort(np.where(np.isnan(means), np.inf, means), kind="stable")
+    rows = latest[order]
+    return {
+        "url": data["urls"][data["url_codes"][rows]],
+        "created_at": data["created_at"][rows],
+        "mean_score": means[order],
+        **{category: data["scores"][rows, i] for i, category in enumerate(SCORE_COLUMNS)}
+    }
+
+
+def build_report(store, since=None, period="day", worst=20):
+    """
+    Build the full site report.
+
+    Args:
+        store (ResultsStore): Results to report on
+        since (float): Only include results from this Unix time on
+        period (str): Trend bucket, "day" or "week"
+        worst (int): Number of lowest-scoring pages to list
+    """
+    data = load_scores(store, since=since)
+    pages = page_table(data)
+    latest_scores = data["scores"][latest_per_url(data)]
+
+    return {
+        "results": int(len(data["created_at"])),
+        "pages": int(len(data["urls"])),
+        # Distributions use each page's newest result so re-runs don't skew them
+        "distributions": distributions(latest_scores),
+        "worst_pages": [
+            {
+                "url": pages["url"][i],
+                "mean_score": _float_or_none(pages["mean_score"][i]),
+                **{category: _score_name(pages[category][i]) for category in SCORE_COLUMNS}
+            }
+            for i in range(min(worst, len(pages["url"])))
+        ],
+        "trends": trends(data, period=period)
+    }
+
+
+def export_csv(pages):
+    """Render the page table as CSV text."""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    columns = list(pages)
+    writer.writerow(columns)
+    writer.writerows(zip(*(pages[column].tolist() for column in columns)))
+    return output.getvalue()
+
+
+def export_parquet(pages):
+    """
+    Render the page table as Parquet bytes.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("pyarrow is required for Parquet export")
+    table = pa.table({column: pa.array(values.tolist() if values.dtype == object else values)
+                      for column, values in pages.items()})
+    output = io.BytesIO()
+    pq.write_table(table, output)
+    return output.getvalue()
+
+
+def _float_or_none(value):
+    return None if np.isnan(value) else round(float(value), 3)
+
+
+def _score_name(value):
+    return None if np.isnan(value) else SCORE_NAMES[int(value) - 1]
+
+
+def main():
+    """Print a report or export the page table from the command line."""
+    parser = argparse.ArgumentParser(description="Site-wide documentation score reports")
+    parser.add_argument("--db", default="results.db", help="Results database")
+    parser.add_argument("--days", type=float, help="Only include the last N days")
+    parser.add_argument("--period", choices=list(PERIODS), default="day", help="Trend bucket size")
+    parser.add_argument("--csv", help="Write the per-page table to this CSV file")
+    parser.add_argument("--parquet", help="Write the per-page table to this Parquet file")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.db)
+    since = time.time() - args.days * 86400 if args.days else None
+
+    start = time.perf_counter()
+    report = build_report(store, since=since, period=args.period)
+    print(f"Report over {report['results']} results / {report['pages']} pages "
+          f"computed in {time.perf_counter() - start:.2f}s\n")
+
+    for category, counts in report["distributions"].items():
+        print(f"{category}: {counts}")
+    print("\nWorst pages:")
+    for page in report["worst_pages"]:
+        print(f"  {page['mean_score']}  {page['url']}")
+
+    if args.csv or args.parquet:
+        pages = page_table(load_scores(store, since=since))
+        if args.csv:
+            with open(args.csv, 'w', encoding='utf-8', newline='') as f:
+                f.write(export_csv(pages))
+            print(f"\nPage table saved to: {args.csv}")
+        if args.parquet:
+            with open(args.parquet, 'wb') as f:
+                f.write(export_parquet(pages))
+            print(f"Page table saved to: {args.parquet}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Persistent results store.
+Keeps every analysis (and revision, if any) in an SQLite database in WAL
+mode, indexed by URL and time, with bulk inserts for batch runs and a
+background writer that keeps inserts off the request path.
+"""
+
+import hashlib
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+# One integer column per category so reports can load scores without
+# parsing the analysis JSON
+SCORE_COLUMNS = ["readability", "structure", "completeness", "style_guidelines"]
+SCORE_VALUES = {'Excellent': 4, 'Good': 3, 'Fair': 2, 'Poor': 1}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    content_hash TEXT,
+    overall_score TEXT,
+    {", ".join(f"{column} INTEGER" for column in SCORE_COLUMNS)},
+    analysis TEXT NOT NULL,
+    revision TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_results_url_time ON results (url, created_at);
+CREATE INDEX IF NOT EXISTS idx_results_time ON results (created_at);
+"""
+
+COLUMNS = ["url", "created_at", "content_hash", "overall_score"] + SCORE_COLUMNS + ["analysis", "revision"]
+INSERT_SQL = f"INSERT INTO results ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})"
+
+
+def make_record(url, analysis, overall_score, content=None, revision=None, created_at=None):
+    """
+    Build a row for the results table.
+
+    Args:
+        url (str): Analyzed URL
+        analysis (dict): Validated analysis
+        overall_score (str): Result of calculate_overall_score
+        content (str): Scraped content, stored only as a hash
+        revision (str): Revised article, if one was generated
+        created_at (float): Unix time, defaults to now
+    """
+    return (
+        url,
+        created_at or time.time(),
+        hashlib.sha256(content.encode('utf-8')).hexdigest() if content else None,
+        overall_score,
+        *[SCORE_VALUES.get(analysis.get(column, {}).get('score')) for column in SCORE_COLUMNS],
+        json.dumps(analysis, ensure_ascii=False),
+        revision
+    )
+
+
+def row_to_dict(row):
+    """Convert a results row into the shape returned by the API."""
+    return {
+        "id": row["id"],
+        "url": row["url"],
+        "created_at": row["created_at"],
+        "content_hash": row["content_hash"],
+        "overall_score": row["overall_score"],
+        "analysis": json.loads(row["analysis"]),
+        "revision": row["revision"]
+    }
+
+
+class ResultsStore:
+    """SQLite-backed history of analysis results."""
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.queue = queue.Queue()
+        self.writer = None
+        self.writer_lock = threading.Lock()
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self):
+        # One connection per thread; WAL lets readers run alongside the writer
+        if not hasattr(self.local, "conn"):
+            self.local.conn = self._connect()
+        return self.local.conn
+
+    def insert_many(self, records):
+        """Insert records built by make_record in a single transaction."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(INSERT_SQL, records)
+        finally:
+            conn.close()
+
+    def insert(self, record):
+        """Insert one record synchronously."""
+        self.insert_many([record])
+
+    def submit(self, record):
+        """Queue a record for the background writer and return immediately."""
+        with self.writer_lock:
+            if self.writer is None:
+                self.writer = threading.Thread(target=self._write_loop, name="results-writer", daemon=True)
+                self.writer.start()
+        self.queue.put(record)
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            records = [self.queue.get()]
+            # Group whatever else is already queued into the same transaction
+            while len(records) < 500:
+                try:
+                    records.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    conn.executemany(INSERT_SQL, records)
+            except sqlite3.Error as e:
+                print(f"Error saving {len(records)} results: {e}")
+            for _ in records:
+                self.queue.task_done()
+
+    def flush(self):
+        """Block until every submitted record has been written."""
+        if self.writer is not None:
+            self.queue.join()
+
+    def history(self, url=None, limit=20, since=None):
+        """
+        Return results newest first.
+
+        Args:
+            url (str): Only results for this URL
+            limit (int): Maximum number of results
+            since (float): Only results created at or after this Unix time
+        """
+        conditions = []
+        params = []
+        if url:
+            conditions.append("url = ?")
+            params.append(url)
+        if since is not None:
+            conditions.append("created_at >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._reader().execute(
+            f"SELECT * FROM results {where} ORDER BY created_at DESC LIMIT ?",
+            params + [limit]
+        ).fetchall()
+        return [row_to_dict(row) for row in rows]
+
+    def score_rows(self, since=None):
+        """
+        Return (url, created_at, *category scores) tuples for bulk reporting.
+
+        Reads only the indexed score columns, never the analysis JSON.
+        """
+        columns = ", ".join(["url", "created_at"] + SCORE_COLUMNS)
+        if since is None:
+            return self._reader().execute(f"SELECT {columns} FROM results").fetchall()
+        return self._reader().execute(
+            f"SELECT {columns} FROM results WHERE created_at >= ?", (since,)
+        ).fetchall()
+
+    def latest(self, url):
+        """Return the newest result for a URL, or None."""
+        results = self.history(url=url, limit=1)
+        return results[0] if results else None
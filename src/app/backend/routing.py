@@ -0,0 +1,171 @@
+"""
+Cost/latency-aware model routing.
+Picks a Gemini tier from the task, content length and previous scores, and
+in cascade mode starts cheap and escalates only when the output fails
+validation or comes back low-confidence. Tracks per-tier latency and
+escalation rates.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Cheapest/fastest first; override with MODEL_TIERS="lite=model-a,standard=model-b,..."
+DEFAULT_TIERS = [
+    ("lite", "gemini-2.0-flash-lite"),
+    ("standard", "gemini-2.0-flash"),
+    ("pro", "gemini-2.5-pro"),
+]
+SHORT_WORDS = 1500
+LONG_WORDS = 8000
+
+
+def tiers_from_env(value=None):
+    """Parse MODEL_TIERS into (name, model) pairs, falling back to DEFAULT_TIERS."""
+    value = value if value is not None else os.getenv("MODEL_TIERS")
+    if not value:
+        return list(DEFAULT_TIERS)
+    tiers = []
+    for item in value.split(","):
+        name, _, model = item.strip().partition("=")
+        if name and model:
+            tiers.append((name.strip(), model.strip()))
+    return tiers or list(DEFAULT_TIERS)
+
+
+class ModelRouter:
+    """Routes analysis and revision calls across model tiers."""
+
+    def __init__(self, tiers=None, cascade=True, short_words=SHORT_WORDS, long_words=LONG_WORDS):
+        """
+        Args:
+            tiers (list): (name, model) pairs, cheapest first
+            cascade (bool): Escalate to the next tier on invalid or low-confidence output
+            short_words (int): Content up to this length starts on the cheapest tier
+            long_words (int): Content above this length starts on the top tier
+        """
+        self.tiers = tiers or tiers_from_env()
+        self.cascade = cascade
+        self.short_words = short_words
+        self.long_words = long_words
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.counts = {
+            name: {"calls": 0, "failures": 0, "escalations": 0, "total_latency": 0.0}
+            for name, _ in self.tiers
+        }
+
+    def select_tier(self, task, content, previous_score=None):
+        """
+        Pick the starting tier index.
+
+        Args:
+            task (str): "analysis" or "revision"
+            content (str): Article content
+            previous_score (str): Last overall score for the page, if known
+        """
+        words = len(content.split())
+        if words <= self.short_words:
+            tier = 0
+        elif words <= self.long_words:
+            tier = 1
+        else:
+            tier = 2
+        # Poorly scored pages need more thorough critiques and heavier rewrites
+        # than a cheap model handles well
+        if previous_score == "Poor" or (task == "revision" and previous_score == "Fair"):
+            tier += 1
+        return min(tier, len(self.tiers) - 1)
+
+    def run(self, task, content, call, validate, previous_score=None):
+        """
+        Run a model call with routing and, if enabled, cascading.
+
+        Args:
+            task (str): "analysis" or "revision"
+            content (str): Article content used for routing
+            call (callable): call(model_name) -> raw model output
+            validate (callable): validate(output) -> (result, confident);
+                raises ValueError (or json.JSONDecodeError) on invalid output
+            previous_score (str): Last overall score for the page, if known
+
+        Returns:
+            The validated result from the first tier that produced a confident
+            answer, or the last tier's valid answer
+
+        Raises:
+            The last tier's validation error if no tier produced valid output
+        """
+        start_tier = self.select_tier(task, content, previous_score)
+        last_tier = len(self.tiers) - 1 if self.cascade else start_tier
+        fallback = None
+
+        for index in range(start_tier, last_tier + 1):
+            name, model = self.tiers[index]
+            start = time.monotonic()
+            try:
+                output = call(model)
+            finally:
+                self._record(name, "calls", latency=time.monotonic() - start)
+                route = getattr(self.local, "route", None)
+                if route is not None:
+                    route.append(name)
+
+            try:
+                result, confident = validate(output)
+            except ValueError as e:
+                self._record(name, "failures")
+                if index == last_tier:
+                    if fallback is not None:
+                        return fallback
+                    raise
+                print(f"{task} output from {name} tier failed validation ({e}), escalating")
+                self._record(name, "escalations")
+                continue
+
+            if confident or index == last_tier:
+                return result
+            print(f"{task} output from {name} tier is low-confidence, escalating")
+            self._record(name, "escalations")
+            fallback = result
+
+        return fallback
+
+    @contextmanager
+    def tracking(self):
+        """
+        Collect the tiers called by this thread's runs inside the block.
+
+        Yields:
+            list: Tier names in call order, filled in as the block runs
+        """
+        route = []
+        self.local.route = route
+        try:
+            yield route
+        finally:
+            self.local.route = None
+
+    def _record(self, name, counter, latency=None):
+        with self.lock:
+            self.counts[name][counter] += 1
+            if latency is not None:
+                self.counts[name]["total_latency"] += latency
+
+    def stats(self):
+        """Per-tier call counts, average latency and escalation rate."""
+        with self.lock:
+            stats = {}
+            for name, model in self.tiers:
+                counts = self.counts[name]
+                calls = counts["calls"]
+                stats[name] = {
+                    "model": model,
+                    "calls": calls,
+                    "failures": counts["failures"],
+                    "escalations": counts["escalations"],
+                    "avg_latency": round(counts["total_latency"] / calls, 3) if calls else None,
+                    "escalation_rate": round(counts["escalations"] / calls, 3) if calls else None
+                }
+            return stats
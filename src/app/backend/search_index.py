@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+Site-wide full-text index of scraped docs.
+An incremental BM25 inverted index over every scraped page, used to find
+related articles to mention in the analysis prompt so completeness
+suggestions can point at existing pages instead of asking for duplicates.
+Postings are compact typed arrays scored with numpy, and the index is
+saved to a single file.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from array import array
+
+import numpy as np
+
+MAGIC = b"DOCIDX1\n"
+K1 = 1.2
+B = 0.75
+QUERY_TERMS = 24  # Most distinctive terms of a page used to find related pages
+RELATED_MIN_RATIO = 0.5
+MAX_STORED_CHARS = 20000  # Text kept per page for snippets
+SNIPPET_WORDS = 40
+SNIPPET_CHARS = 300
+SAVE_INTERVAL = 60.0
+# Re-scraped pages leave superseded postings behind until compaction
+COMPACT_RATIO = 0.2
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+PUNCTUATION = ".,;:!?()[]{}<>\"'`*"
+STOP_WORDS = frozenset("""
+a an and are as at be by can do does for from has have how if in into is it its
+not of on or our so such that the their then there these this to was we were
+what when which will with you your
+""".split())
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall(text.lower())
+            if len(token) > 1 and token not in STOP_WORDS]
+
+
+def term_counts(tokens):
+    counts = {}
+    for token in tokens:
+        counts[token] = counts.get(token, 0) + 1
+    return counts
+
+
+def page_title(content):
+    for line in content.splitlines():
+        if line.strip():
+            return line.strip()[:200]
+    return ""
+
+
+class SearchIndex:
+    """Thread-safe incremental BM25 index keyed by URL."""
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str): Index file; loaded if it exists, written by save()
+        """
+        self.path = path
+        self.lock = threading.RLock()
+        self.urls = []           # doc id -> URL, None once superseded
+        self.titles = []
+        self.texts = []          # doc id -> zlib-compressed text for snippets
+        self.lengths = array("I")
+        self.alive = array("B")     # doc id -> 0 once superseded
+        self.doc_ids = {}        # URL -> live doc id
+        self.hashes = {}         # URL -> content hash of the indexed version
+        self.postings = {}       # term -> (doc ids array("I"), term frequencies array("H"))
+        self.live_docs = 0
+        self.total_length = 0
+        self.dirty = False
+        self.last_save = time.monotonic()
+        self.saving = False
+        self.save_lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load()
+
+    def add(self, url, content):
+        """
+        Index a page, replacing any earlier version of the same URL.
+
+        Returns:
+            bool: False if the page was already indexed with this content
+        """
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        counts = term_counts(tokenize(content))
+        text = zlib.compress(content[:MAX_STORED_CHARS].encode('utf-8'))
+        length = sum(counts.values())
+
+        with self.lock:
+            if self.hashes.get(url) == digest:
+                return False
+            self._remove(url)
+            doc_id = len(self.urls)
+            self.urls.append(url)
+            self.titles.append(page_title(content))
+            self.texts.append(text)
+            self.lengths.append(length)
+            self.alive.append(1)
+            self.doc_ids[url] = doc_id
+            self.hashes[url] = digest
+            self.live_docs += 1
+            self.total_length += length
+            # Doc ids only grow, so every posting list stays sorted
+            for term, count in counts.items():
+                postings = self.postings.get(term)
+                if postings is None:
+                    postings = self.postings[term] = (array("I"), array("H"))
+                postings[0].append(doc_id)
+                postings[1].append(min(count, 65535))
+            self.dirty = True
+
+            if len(self.urls) - self.live_docs > COMPACT_RATIO * max(len(self.urls), 100):
+                self.compact()
+        return True
+
+    def _remove(self, url):
+        doc_id = self.doc_ids.pop(url, None)
+        if doc_id is None:
+            return
+        self.hashes.pop(url, None)
+        self.urls[doc_id] = None
+        self.texts[doc_id] = None
+        self.alive[doc_id] = 0
+        self.live_docs -= 1
+        self.total_length -= self.lengths[doc_id]
+        self.dirty = True
+
+    def remove(self, url):
+        with self.lock:
+            self._remove(url)
+
+    def compact(self):
+        """Drop superseded pages and renumber doc ids."""
+        with self.lock:
+            live = [doc_id for doc_id, url in enumerate(self.urls) if url is not None]
+            if len(live) == len(self.urls):
+                return
+            new_ids = np.full(len(self.urls), -1, dtype=np.int64)
+            new_ids[live] = np.arange(len(live))
+
+            postings = {}
+            for term, (ids, tfs) in self.postings.items():
+                mapped = new_ids[np.array(ids, dtype=np.int64)]
+                keep = mapped >= 0
+                if keep.any():
+                    postings[term] = (array("I", mapped[keep].astype(np.uint32).tobytes()),
+                                      array("H", np.array(tfs, dtype=np.uint16)[keep].tobytes()))
+            self.postings = postings
+            self.urls = [self.urls[doc_id] for doc_id in live]
+            self.titles = [self.titles[doc_id] for doc_id in live]
+            self.texts = [self.texts[doc_id] for doc_id in live]
+            self.lengths = array("I", (self.lengths[doc_id] for doc_id in live))
+            self.alive = array("B", [1]) * len(live)
+            self.doc_ids = {url: doc_id for doc_id, url in enumerate(self.urls)}
+            self.dirty = True
+
+    def search(self, query, limit=5, exclude_url=None):
+        """
+        Rank pages for a query.
+
+        Args:
+            query (str or dict): Query text, or term -> weight
+            limit (int): Maximum number of hits
+            exclude_url (str): URL to leave out, usually the page being analyzed
+
+        Returns:
+            list: Hits as dicts with "url", "title", "score" and "snippet"
+        """
+        weights = query if isinstance(query, dict) else term_counts(tokenize(query))
+        with self.lock:
+            if not self.live_docs or not weights:
+                return []
+            scores = self._score(weights)
+            scores *= np.array(self.alive, dtype=np.float32)
+            if exclude_url in self.doc_ids:
+                scores[self.doc_ids[exclude_url]] = 0.0
+
+            candidates = np.flatnonzero(scores > 0)
+            if len(candidates) > limit:
+                candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+            candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+            hits = []
+            for doc_id in candidates:
+                text = zlib.decompress(self.texts[doc_id]).decode('utf-8')
+                hits.append({
+                    "url": self.urls[doc_id],
+                    "title": self.titles[doc_id],
+                    "score": round(float(scores[doc_id]), 3),
+                    "snippet": best_snippet(text, weights)
+                })
+            return hits
+
+    def _score(self, weights):
+        """BM25 score of every doc id for term -> weight."""
+        scores = np.zeros(len(self.urls), dtype=np.float32)
+        lengths = np.array(self.lengths, dtype=np.float32)
+        avg_length = self.total_length / self.live_docs or 1.0
+        norms = K1 * (1 - B + B * lengths / avg_length)
+        for term, weight in weights.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            # Copies, so the arrays stay appendable while views are alive
+            ids = np.array(postings[0], dtype=np.int64)
+            tfs = np.array(postings[1], dtype=np.float32)
+            df = len(ids)
+            idf = math.log(1 + (self.live_docs - df + 0.5) / (df + 0.5))
+            # Each doc appears once per posting list, so fancy-index += is safe
+            scores[ids] += weight * idf * tfs * (K1 + 1) / (tfs + norms[ids])
+        return scores
+
+    def query_terms(self, content, count=QUERY_TERMS):
+        """Pick the terms of a page that best separate it from the rest of the site."""
+        counts = term_counts(tokenize(content))
+        with self.lock:
+            n = max(self.live_docs, 1)
+            weighted = []
+            for term, tf in counts.items():
+                postings = self.postings.get(term)
+                df = len(postings[0]) if postings else 0
+                weighted.append((tf * math.log(1 + (n - df + 0.5) / (df + 0.5)), term))
+        weighted.sort(reverse=True)
+        return {term: 1.0 for _, term in weighted[:count]}
+
+    def related(self, content, url=None, limit=3):
+        """Pages related to a page's content, excluding the page itself."""
+        hits = self.search(self.query_terms(content), limit=limit, exclude_url=url)
+        # Drop pages that only share a stray term with the best match
+        return [hit for hit in hits if hit["score"] >= RELATED_MIN_RATIO * hits[0]["score"]]
+
+    def stats(self):
+        with self.lock:
+            postings = sum(len(ids) for ids, _ in self.postings.values())
+            return {
+                "documents": self.live_docs,
+                "superseded": len(self.urls) - self.live_docs,
+                "terms": len(self.postings),
+                "postings": postings,
+                "posting_bytes": postings * 6,
+                "text_bytes": sum(len(text) for text in self.texts if text)
+            }
+
+    def save(self, path=None):
+        """
+        Write the index to a single file, replacing it atomically.
+
+        Only taking a snapshot holds the index lock; serializing and
+        writing happen outside it, so searches aren't blocked for the
+        length of a save. Concurrent saves run one at a time.
+        """
+        path = path or self.path
+        with self.save_lock:
+            with self.lock:
+                self.compact()
+                urls = list(self.urls)
+                titles = list(self.titles)
+                hashes = [self.hashes[url] for url in urls]
+                texts = list(self.texts)
+                lengths = self.lengths.tobytes()
+                # Posting arrays are only appended to (compaction builds new
+                # ones), so their current lengths are a consistent snapshot
+                postings = [(term, ids, tfs, len(ids)) for term, (ids, tfs) in self.postings.items()]
+                self.dirty = False
+                self.last_save = time.monotonic()
+
+            try:
+                header = zlib.compress(json.dumps({
+                    "urls": urls,
+                    "titles": titles,
+                    "hashes": hashes,
+                    "terms": [term for term, _, _, _ in postings],
+                    "df": [count for _, _, _, count in postings],
+                    "text_sizes": [len(text) for text in texts]
+                }, ensure_ascii=False).encode('utf-8'))
+                tmp_path = path + ".tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(MAGIC)
+                    f.write(struct.pack("<Q", len(header)))
+                    f.write(header)
+                    f.write(lengths)
+                    for _, ids, _, count in postings:
+                        f.write(ids.tobytes()[:count * ids.itemsize])
+                    for _, _, tfs, count in postings:
+                        f.write(tfs.tobytes()[:count * tfs.itemsize])
+                    for text in texts:
+                        f.write(text)
+                os.replace(tmp_path, path)
+            except Exception:
+                self.dirty = True
+                raise
+
+    def load(self, path=None):
+        path = path or self.path
+        with open(path, 'rb') as f:
+            data = f.read()
+        if not data.startswith(MAGIC):
+            raise ValueError(f"{path} is not a search index file")
+        offset = len(MAGIC)
+        (header_size,) = struct.unpack_from("<Q", data, offset)
+        offset += 8
+        header = json.loads(zlib.decompress(data[offset:offset + header_size]))
+        offset += header_size
+
+        def take(typecode, count):
+            nonlocal offset
+            values = array(typecode)
+            values.frombytes(data[offset:offset + count * values.itemsize])
+            offset += count * values.itemsize
+            return values
+
+        with self.lock:
+            self.urls = header["urls"]
+            self.titles = header["titles"]
+            self.hashes = dict(zip(self.urls, header["hashes"]))
+            self.doc_ids = {url: doc_id for doc_id, url in enumerate(self.urls)}
+            self.lengths = take("I", len(self.urls))
+            self.alive = array("B", [1]) * len(self.urls)
+            ids = [take("I", df) for df in header["df"]]
+            tfs = [take("H", df) for df in header["df"]]
+            self.postings = {term: pair for term, pair in zip(header["terms"], zip(ids, tfs))}
+            self.texts = []
+            for size in header["text_sizes"]:
+                self.texts.append(data[offset:offset + size])
+                offset += size
+            self.live_docs = len(self.urls)
+            self.total_length = sum(self.lengths)
+            self.dirty = False
+
+    def flush(self):
+        """Save now if there are unsaved changes."""
+        if self.path and self.dirty:
+            self.save()
+
+    def save_if_due(self, interval=SAVE_INTERVAL):
+        """Save from a background thread if there are changes and the last save is old enough."""
+        with self.lock:
+            if (not self.path or not self.dirty or self.saving
+                    or time.monotonic() - self.last_save < interval):
+                return
+            self.saving = True
+
+        def run():
+            try:
+                self.save()
+            except Exception as e:
+                print(f"Error saving search index: {e}")
+            finally:
+                self.saving = False
+
+        threading.Thread(target=run, name="search-index-save", daemon=True).start()
+
+
+def best_snippet(text, weights, words=SNIPPET_WORDS, max_chars=SNIPPET_CHARS):
+    """The window of `words` words containing the most query terms."""
+    tokens = text.split()
+    if not tokens:
+        return ""
+    hits = [1 if token.lower().strip(PUNCTUATION) in weights else 0 for token in tokens]
+    best_start, best = 0, -1
+    window = sum(hits[:words])
+    for start in range(max(len(tokens) - words, 0) + 1):
+        if start:
+            window += (hits[start + words - 1] if start + words - 1 < len(hits) else 0) - hits[start - 1]
+        if window > best:
+            best_start, best = start, window
+    snippet = " ".join(tokens[best_start:best_start + words])
+    if len(snippet) > max_chars:
+        snippet = snippet[:max_chars].rsplit(" ", 1)[0] + "..."
+    return snippet
+
+
+def format_related(hits):
+    """Compact prompt context listing related articles."""
+    return "\n".join(f"- {hit['title']} ({hit['url']}): {hit['snippet']}" for hit in hits)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the site-wide search index")
+    parser.add_argument("index", help="Index file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Index the latest snapshot of every archived URL")
+    build.add_argument("snapshot_dir", help="Snapshot archive directory (see snapshots.py)")
+    query = subparsers.add_parser("query", help="Search the index")
+    query.add_argument("text", help="Query text")
+    query.add_argument("--limit", type=int, default=5)
+    subparsers.add_parser("stats", help="Show index size")
+    args = parser.parse_args()
+
+    index = SearchIndex(args.index)
+    if args.command == "build":
+        from extraction import extract_content
+        from snapshots import SnapshotStore
+        store = SnapshotStore(args.snapshot_dir)
+        start = time.perf_counter()
+        entries = store.entries(latest_only=True)
+        for entry in entries:
+            index.add(entry["url"], extract_content(store.load(entry["hash"])))
+        index.save()
+        print(f"Indexed {len(entries)} pages in {time.perf_counter() - start:.2f}s")
+    elif args.command == "query":
+        start = time.perf_counter()
+        hits = index.search(args.text, limit=args.limit)
+        elapsed = (time.perf_counter() - start) * 1000
+        for hit in hits:
+            print(f"{hit['score']:8.3f}  {hit['title']} ({hit['url']})\n          {hit['snippet']}")
+        print(f"{len(hits)} hits in {elapsed:.1f}ms")
+    if args.command in ("build", "stats"):
+        print(json.dumps(index.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Raw HTML snapshot archive.
+Stores the rendered DOM of every scrape as compressed, content-addressed
+blobs with a small JSON-lines index, and replays extraction or analysis
+from the archive without a browser or network.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:  # zlib is always available, just slower and larger
+    zstandard = None
+
+from extraction import extract_content
+
+
+class SnapshotStore:
+    """Content-deduplicated store of page HTML keyed by SHA-256."""
+
+    def __init__(self, root):
+        self.root = root
+        self.index_path = os.path.join(root, "index.jsonl")
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        if zstandard:
+            self.extension = ".zst"
+            self.compressor = zstandard.ZstdCompressor(level=10)
+            self.decompressor = zstandard.ZstdDecompressor()
+        else:
+            self.extension = ".z"
+
+    def _blob_path(self, digest, extension):
+        return os.path.join(self.root, "blobs", digest[:2], digest + extension)
+
+    def save(self, url, html):
+        """
+        Archive the HTML for a scraped URL.
+
+        Identical pages are stored once; every call still adds an index entry.
+
+        Returns:
+            str: Content hash of the snapshot
+        """
+        data = html.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest, self.extension)
+
+        with self.lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if zstandard:
+                    blob = self.compressor.compress(data)
+                else:
+                    blob = zlib.compress(data, 9)
+                tmp_path = path + ".tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(blob)
+                os.replace(tmp_path, path)
+
+            entry = {
+                "url": url,
+                "hash": digest,
+                "timestamp": datetime.now().isoformat(),
+                "size": len(data)
+            }
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
+        return digest
+
+    def load(self, digest):
+        """Return the archived HTML for a content hash."""
+        for extension in (".zst", ".z"):
+            path = self._blob_path(digest, extension)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    blob = f.read()
+                if extension == ".z":
+                    return zlib.decompress(blob).decode('utf-8')
+                if not zstandard:
+                    raise RuntimeError("zstandard is required to read .zst snapshots")
+                return self.decompressor.decompress(blob).decode('utf-8')
+        raise KeyError(f"No snapshot with hash {digest}")
+
+    def entries(self, url=None, latest_only=False):
+        """
+        List index entries, oldest first.
+
+        Args:
+            url (str): Only return entries for this URL
+            latest_only (bool): Keep only the newest entry per URL
+        """
+        if not os.path.exists(self.index_path):
+            return []
+        entries = []
+        with open(self.index_path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                if url is None or entry["url"] == url:
+                    entries.append(entry)
+        if latest_only:
+            latest = {}
+            for entry in entries:
+                latest[entry["url"]] = entry
+            entries = list(latest.values())
+        return entries
+
+
+def replay(store, url=None, analyze=False, show=False):
+    """
+    Re-run extraction (and optionally analysis) over archived snapshots.
+
+    Args:
+        store (SnapshotStore): Archive to read from
+        url (str): Only replay this URL
+        analyze (bool): Also run analyze_with_gemini on the extracted content
+        show (bool): Print the extracted content
+    """
+    entries = store.entries(url=url, latest_only=True)
+    if not entries:
+        print("No snapshots found")
+        return
+
+    if analyze:
+        # Imported lazily so extraction-only replays need no browser or API key
+        from main import analyze_with_gemini, print_results
+
+    start = time.perf_counter()
+    total_chars = 0
+    for entry in entries:
+        content = extract_content(store.load(entry["hash"]))
+        total_chars += len(content)
+        print(f"{entry['url']}: {len(content)} characters")
+        if show:
+            print(content)
+        if analyze and content.strip():
+            print_results(entry["url"], analyze_with_gemini(content, entry["url"]))
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    print(f"\nReplayed {len(entries)} pages ({total_chars} characters) in {elapsed:.2f}s "
+          f"({len(entries) / elapsed:.1f} pages/s)")
+
+
+def main():
+    """Command line entry point for replaying the snapshot archive."""
+    parser = argparse.ArgumentParser(description="Replay archived page snapshots")
+    parser.add_argument("root", nargs="?", default=os.getenv("SNAPSHOT_DIR", "snapshots"),
+                        help="Snapshot archive directory")
+    parser.add_argument("--url", help="Only replay this URL")
+    parser.add_argument("--analyze", action="store_true", help="Run Gemini analysis on each page")
+    parser.add_argument("--show", action="store_true", help="Print extracted content")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.root):
+        print(f"Snapshot archive not found: {args.root}")
+        sys.exit(1)
+    replay(SnapshotStore(args.root), url=args.url, analyze=args.analyze, show=args.show)
+
+
+if __name__ == "__main__":
+    main()
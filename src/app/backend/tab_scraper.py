@@ -0,0 +1,288 @@
+"""
+Multi-tab scraping in a single Chrome process.
+Loads several URLs at once in tabs of one browser instead of starting a
+browser per page, polling each tab for readiness, with per-tab time and
+JS heap budgets and periodic browser restarts to shed leaked memory.
+"""
+
+import time
+from collections import deque
+
+from selenium import webdriver
+from selenium.common.exceptions import InvalidSessionIdException, NoSuchWindowException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+from urllib3.exceptions import HTTPError as DriverConnectionError
+
+from extraction import MARK_HIDDEN_SCRIPT, extract_page
+
+CONTENT_SELECTOR = "h1, h2, h3, h4, h5, h6, p, ul, ol, pre, code, tr, th"
+DEFAULT_TABS = 4
+PAGE_TIMEOUT = 30.0
+# Time a page keeps rendering after it looks ready, for client-side content
+# and Cloudflare checks; overlaps across tabs instead of adding up
+SETTLE = 2.0
+MAX_HEAP_MB = 512
+RECYCLE_AFTER = 200
+POLL_INTERVAL = 0.1
+MAX_ATTEMPTS = 2
+# Errors that mean the browser itself is gone, as opposed to one tab
+# misbehaving: a dead session, or chromedriver no longer answering
+SESSION_LOST = (InvalidSessionIdException, DriverConnectionError, ConnectionError)
+
+# The marker is set on the old document before navigating, so a tab still
+# showing its previous page is never mistaken for the new one
+NAVIGATE_SCRIPT = "window.__tabScraperStale = true; window.location.href = arguments[0];"
+STATE_SCRIPT = """
+return [
+    !window.__tabScraperStale && document.readyState === "complete",
+    !!document.querySelector(arguments[0]),
+    (window.performance && performance.memory) ? performance.memory.usedJSHeapSize : 0
+];
+"""
+
+
+def chrome_options(page_load_strategy=None):
+    """Headless Chrome options shared by every scraper."""
+    options = Options()
+    options.add_argument('--headless')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
+    if page_load_strategy:
+        options.page_load_strategy = page_load_strategy
+    return options
+
+
+class Tab:
+    def __init__(self, handle):
+        self.handle = handle
+        self.url = None
+        self.started = None
+        self.ready_at = None
+
+
+class TabScraper:
+    """Scrapes batches of URLs concurrently in tabs of one headless Chrome."""
+
+    def __init__(self, tabs=DEFAULT_TABS, page_timeout=PAGE_TIMEOUT, max_heap_mb=MAX_HEAP_MB,
+                 recycle_after=RECYCLE_AFTER, settle=SETTLE, snapshot_store=None):
+        """
+        Args:
+            tabs (int): Pages loaded at the same time
+            page_timeout (float): Seconds a page may take to become ready
+            max_heap_mb (int): JS heap a tab may use before it is closed
+            recycle_after (int): Pages loaded before the browser is restarted
+            settle (float): Seconds to wait after a page looks ready
+            snapshot_store (SnapshotStore): Optional archive for the page HTML
+        """
+        self.tab_count = tabs
+        self.page_timeout = page_timeout
+        self.max_heap = max_heap_mb * 1024 * 1024
+        self.recycle_after = recycle_after
+        self.settle = settle
+        self.snapshot_store = snapshot_store
+        self.driver = None
+        self.tabs = []
+        self.loaded = 0
+        self.counts = {"pages": 0, "errors": 0, "timeouts": 0, "memory_kills": 0,
+                       "tab_errors": 0, "restarts": 0}
+
+    def start(self):
+        # With the "none" strategy navigation never blocks the driver, so
+        # one thread can drive every tab
+        options = chrome_options("none")
+        # Unquantized performance.memory, for the heap budget
+        options.add_argument('--enable-precise-memory-info')
+        self.driver = webdriver.Chrome(options=options)
+        self.tabs = [Tab(self.driver.current_window_handle)]
+        for _ in range(self.tab_count - 1):
+            self.driver.switch_to.new_window("tab")
+            self.tabs.append(Tab(self.driver.current_window_handle))
+        self.loaded = 0
+        return self
+
+    def close(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+            self.tabs = []
+
+    def restart(self):
+        self.close()
+        self.counts["restarts"] += 1
+        self.start()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def scrape(self, urls):
+        """
+        Scrape every URL, keeping up to `tabs` pages loading at once.
+
+        Args:
+            urls (list): URLs to scrape
+
+        Returns:
+            tuple: (pages, errors) where pages maps URL to the extract_page
+            dict and errors maps URL to a message
+        """
+        pending = deque(urls)
+        attempts = {}
+        pages, errors = {}, {}
+        if self.driver is None:
+            self.start()
+
+        while pending or any(tab.url for tab in self.tabs):
+            recycle_due = self.loaded >= self.recycle_after
+            if recycle_due and not any(tab.url for tab in self.tabs):
+                print(f"Restarting browser after {self.loaded} pages")
+                self.restart()
+                recycle_due = False
+
+            try:
+                for tab in self.tabs:
+                    if tab.url is not None:
+                        self._step(tab, pages, errors, pending, attempts)
+                    elif pending and not recycle_due:
+                        url = pending.popleft()
+                        attempts[url] = attempts.get(url, 0) + 1
+                        self._step(tab, pages, errors, pending, attempts, url)
+            except SESSION_LOST + (NoSuchWindowException,) as e:
+                # Retry whatever was loading in a fresh browser. Only the
+                # tab that was being driven is charged an attempt.
+                message = e.msg if isinstance(e, WebDriverException) else e
+                print(f"Browser session lost ({message}), restarting")
+                crashed = tab
+                for tab in self.tabs:
+                    if tab.url is None:
+                        continue
+                    if tab is not crashed:
+                        attempts[tab.url] -= 1
+                    self._requeue(tab, pending, attempts, errors, "browser crashed")
+                self.restart()
+                continue
+
+            time.sleep(POLL_INTERVAL)
+        return pages, errors
+
+    def _step(self, tab, pages, errors, pending, attempts, url=None):
+        """
+        Load `url` in the tab, or poll the page it is loading.
+
+        Errors confined to the tab are handled here; SESSION_LOST errors,
+        and a NoSuchWindowException while reopening a tab, propagate.
+        """
+        try:
+            if url is not None:
+                self._load(tab, url)
+            else:
+                self._poll(tab, pages, errors)
+        except SESSION_LOST:
+            raise
+        except NoSuchWindowException:
+            # The tab was closed under us, usually by a renderer crash
+            self.counts["tab_errors"] += 1
+            if tab.url is not None:
+                self._requeue(tab, pending, attempts, errors, "tab crashed")
+            self._reopen(tab)
+        except WebDriverException as e:
+            # Scripts fail while a page is navigating or tearing down its
+            # context; the next poll usually succeeds
+            self.counts["tab_errors"] += 1
+            if tab.url is None:
+                return
+            print(f"Tab error on {tab.url} ({e.msg}), continuing")
+            if url is not None:
+                # Navigation may not have started, so the old page could
+                # pass for the new one; load it again later
+                self._requeue(tab, pending, attempts, errors, e.msg)
+            elif time.monotonic() - tab.started > self.page_timeout:
+                self.counts["timeouts"] += 1
+                self._fail(tab, errors, f"not ready after {self.page_timeout:.0f}s ({e.msg})")
+
+    def _load(self, tab, url):
+        tab.url = url
+        tab.started = time.monotonic()
+        tab.ready_at = None
+        self.loaded += 1
+        self.driver.switch_to.window(tab.handle)
+        self.driver.execute_script(NAVIGATE_SCRIPT, url)
+
+    def _poll(self, tab, pages, errors):
+        self.driver.switch_to.window(tab.handle)
+        ready, has_content, heap = self.driver.execute_script(STATE_SCRIPT, CONTENT_SELECTOR)
+        now = time.monotonic()
+
+        if heap > self.max_heap:
+            self.counts["memory_kills"] += 1
+            self._fail(tab, errors, f"JS heap exceeded {self.max_heap // (1024 * 1024)}MB")
+            self._replace(tab)
+            return
+
+        if ready and has_content:
+            tab.ready_at = tab.ready_at or now
+            if now - tab.ready_at >= self.settle:
+                self._finish(tab, pages, errors)
+        elif now - tab.started > self.page_timeout:
+            self.counts["timeouts"] += 1
+            self._fail(tab, errors, f"not ready after {self.page_timeout:.0f}s")
+            self.driver.execute_script("window.stop();")
+
+    def _finish(self, tab, pages, errors):
+        self.driver.execute_script(MARK_HIDDEN_SCRIPT)
+        html = self.driver.page_source
+        url = tab.url
+        if self.snapshot_store:
+            self.snapshot_store.save(url, html)
+        page = extract_page(html)
+        if not page["content"].strip():
+            self._fail(tab, errors, "No content found on the page")
+            return
+        pages[url] = page
+        self.counts["pages"] += 1
+        print(f"Scraped {url}: {len(page['content'])} characters")
+        tab.url = None
+
+    def _fail(self, tab, errors, message):
+        print(f"Error scraping {tab.url}: {message}")
+        errors[tab.url] = message
+        self.counts["errors"] += 1
+        tab.url = None
+
+    def _requeue(self, tab, pending, attempts, errors, message):
+        """Free the tab and retry its URL, or fail it after MAX_ATTEMPTS."""
+        if attempts[tab.url] < MAX_ATTEMPTS:
+            pending.appendleft(tab.url)
+            tab.url = None
+        else:
+            self._fail(tab, errors, message)
+
+    def _reopen(self, tab):
+        """Open a new tab in place of one that is already closed."""
+        handles = [handle for handle in self.driver.window_handles if handle != tab.handle]
+        if not handles:
+            raise NoSuchWindowException("every tab is closed")
+        self.driver.switch_to.window(handles[0])
+        self.driver.switch_to.new_window("tab")
+        tab.handle = self.driver.current_window_handle
+
+    def _replace(self, tab):
+        """Swap a tab for a fresh one, releasing its renderer's memory."""
+        old_handle = tab.handle
+        # Open the new tab first; closing the last tab would end the session
+        self.driver.switch_to.new_window("tab")
+        tab.handle = self.driver.current_window_handle
+        self.driver.switch_to.window(old_handle)
+        self.driver.close()
+        self.driver.switch_to.window(tab.handle)
+
+    def stats(self):
+        return {"tabs": self.tab_count, "loaded_since_restart": self.loaded, **self.counts}
+
@@ -0,0 +1,63 @@
+"""
+Text, link and anchor extraction from rendered page HTML. Run with pytest
+from this directory.
+"""
+
+import pytest
+
+from extraction import HIDDEN_MARKER, extract_content, extract_page, is_hidden
+
+
+def test_extracts_content_elements_in_order():
+    html = """
+    <html><body><nav><a href="/home">Home</a></nav>
+    <h1>Title</h1>
+    <p>First   line<br>second&nbsp;line</p>
+    <ul><li>One</li><li>Two</li></ul>
+    <table><tr><td>a</td><td>b</td></tr></table>
+    <script>var ignored = 1;</script>
+    </body></html>
+    """
+    assert extract_content(html) == "\nTitle\n\n\nFirst line\nsecond line\n\nOne\nTwo\n\na b"
+
+
+def test_collects_links_and_anchors():
+    page = extract_page('<h2 id="setup">Setup</h2><a name="old"></a>'
+                        '<p><a href=" /docs/x#setup ">x</a></p><script><a href="/no"></a></script>')
+    assert page["links"] == ["/docs/x#setup"]
+    assert page["anchors"] == {"setup", "old"}
+
+
+@pytest.mark.parametrize("attributes", [
+    "hidden",
+    f"{HIDDEN_MARKER}",
+    'aria-hidden="true"',
+    'style="color: red; display:none"',
+    'style="DISPLAY : NONE"',
+])
+def test_hidden_elements_drop_their_text(attributes):
+    html = f'<h1>Shown</h1><div {attributes}><p>Secret</p><a href="/menu">Menu</a></div><p>After</p>'
+    page = extract_page(html)
+    assert page["content"] == "\nShown\n\n\nAfter"
+    # Links in collapsed menus and tabs still get checked
+    assert page["links"] == ["/menu"]
+
+
+@pytest.mark.parametrize("attributes", [
+    'aria-hidden="false"',
+    'style="display: block"',
+    'style="visibility: hidden"',
+    'data-display="none"',
+])
+def test_visible_elements_keep_their_text(attributes):
+    assert extract_content(f"<div {attributes}><p>Shown</p></div>") == "Shown"
+
+
+def test_hidden_state_ends_with_unclosed_children():
+    html = '<section hidden><p>Secret<span>more</section><p>Visible</p>'
+    assert extract_content(html) == "Visible"
+
+
+def test_is_hidden():
+    assert is_hidden([("hidden", None)])
+    assert not is_hidden([("class", "hidden"), ("style", "display: flex")])
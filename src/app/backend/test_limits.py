@@ -0,0 +1,105 @@
+"""
+AdaptiveLimiter admission, queueing and AIMD adjustment. Run with pytest
+from this directory.
+"""
+
+import threading
+import time
+
+import pytest
+
+from limits import AdaptiveLimiter, Overloaded
+
+
+def finish(limiter, latency, success=True, latency_key=None):
+    """Hold a slot for `latency` seconds without sleeping."""
+    limiter.release(limiter.acquire() - latency, success, latency_key)
+
+
+def test_limit_grows_only_while_in_use():
+    limiter = AdaptiveLimiter("test", initial_limit=1, max_limit=3)
+    for _ in range(10):
+        finish(limiter, 0.01)
+    # One request at a time only ever fills a limit of 1
+    assert limiter.limit == 2
+
+    for _ in range(10):
+        starts = [limiter.acquire() for _ in range(int(limiter.limit))]
+        for start in starts:
+            limiter.release(start - 0.01)
+    assert limiter.stats()["limit"] == 3
+
+
+def test_errors_back_off_once_per_episode():
+    limiter = AdaptiveLimiter("test", initial_limit=8, backoff=0.5)
+    finish(limiter, 10.0)  # Sets a 10s average, the backoff spacing
+    finish(limiter, 0.01, success=False)
+    finish(limiter, 0.01, success=False)
+    assert limiter.limit == 4
+    assert limiter.stats()["errors"] == 2
+
+
+def test_slow_requests_count_as_overload_against_their_own_baseline():
+    limiter = AdaptiveLimiter("test", initial_limit=8, backoff=0.5, tolerance=2.0)
+    finish(limiter, 0.01, latency_key="lite")
+    finish(limiter, 0.05, latency_key="pro")
+    finish(limiter, 0.05, latency_key="pro")
+    assert limiter.limit == 8
+    finish(limiter, 0.05, latency_key="lite")
+    assert limiter.limit == 4
+    assert limiter.stats()["baselines"] == {"lite": 0.01, "pro": 0.05}
+
+
+def test_limit_stays_within_bounds():
+    limiter = AdaptiveLimiter("test", initial_limit=2, min_limit=1, backoff=0.1)
+    finish(limiter, 0.0, success=False)
+    assert limiter.limit == 1
+
+
+def test_neutral_errors_release_without_adjusting():
+    limiter = AdaptiveLimiter("test", initial_limit=2, neutral_errors=(ValueError,))
+    with pytest.raises(ValueError):
+        with limiter.slot():
+            raise ValueError("bad input")
+    with pytest.raises(RuntimeError):
+        with limiter.slot():
+            raise RuntimeError("stage failed")
+    stats = limiter.stats()
+    assert stats["in_flight"] == 0 and stats["errors"] == 1 and limiter.limit == 1.5
+
+
+def test_full_queue_sheds_immediately():
+    limiter = AdaptiveLimiter("test", initial_limit=1, max_queue=0)
+    start = limiter.acquire()
+    with pytest.raises(Overloaded) as error:
+        limiter.acquire(timeout=5)
+    assert error.value.retry_after >= 1
+    with pytest.raises(Overloaded):
+        limiter.check()
+    limiter.release(start)
+    limiter.check()
+
+
+def test_waiter_gets_freed_slot_or_times_out():
+    limiter = AdaptiveLimiter("test", initial_limit=1, max_queue=4)
+    start = limiter.acquire()
+    with pytest.raises(Overloaded):
+        limiter.acquire(timeout=0.05)
+    assert limiter.stats()["timed_out"] == 1
+    # No wait left in the budget and no free slot: shed without queueing
+    with pytest.raises(Overloaded):
+        limiter.acquire(timeout=-1)
+
+    threading.Timer(0.05, limiter.release, [start]).start()
+    began = time.monotonic()
+    limiter.release(limiter.acquire(timeout=5))
+    assert time.monotonic() - began < 1
+
+
+def test_queue_timeout_caps_the_wait():
+    limiter = AdaptiveLimiter("test", initial_limit=1, queue_timeout=0.05)
+    limiter.acquire()
+    began = time.monotonic()
+    with pytest.raises(Overloaded):
+        limiter.acquire(timeout=60)
+    assert time.monotonic() - began < 1
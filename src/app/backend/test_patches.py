@@ -0,0 +1,108 @@
+"""
+Block numbering, edit parsing and the local edit applier used by patch
+revisions. Run with pytest from this directory.
+"""
+
+import json
+
+import pytest
+
+from patches import apply_edits, number_blocks, parse_edits, split_blocks, unified_diff
+
+CONTENT = "\nIntro\n\n\nFirst paragraph.\n\nSecond paragraph.\n\n  \n\nLast paragraph."
+BLOCKS = ["Intro", "First paragraph.", "Second paragraph.", "Last paragraph."]
+
+
+def test_split_and_number_blocks():
+    assert split_blocks(CONTENT) == BLOCKS
+    assert number_blocks(BLOCKS[:2]) == "[p1] Intro\n\n[p2] First paragraph."
+
+
+def test_parse_edits_accepts_list_or_edits_object():
+    edits = [{"op": "delete", "id": "p1"}]
+    assert parse_edits(json.dumps(edits)) == edits
+    assert parse_edits(json.dumps({"edits": edits + ["stray", 3]})) == edits
+
+
+@pytest.mark.parametrize("text", ['{"op": "delete"}', '"delete p1"', '{"edits": null}'])
+def test_parse_edits_rejects_non_lists(text):
+    with pytest.raises(ValueError):
+        parse_edits(text)
+
+
+def test_parse_edits_raises_on_invalid_json():
+    with pytest.raises(json.JSONDecodeError):
+        parse_edits('[{"op": "delete", "id": "p1"')
+
+
+def test_apply_edits_reassembles_blocks():
+    edits = [
+        {"op": "replace", "id": "p2", "text": "  Rewritten first.  "},
+        {"op": "delete", "id": "p3"},
+        {"op": "insert_after", "id": "p4", "text": "Appended."},
+        {"op": "insert_after", "id": "p1", "text": "After intro."},
+        {"op": "insert_after", "id": "p1", "text": "Also after intro."},
+    ]
+    revised, applied, rejected = apply_edits(BLOCKS, edits)
+    assert revised == ["Intro", "After intro.", "Also after intro.", "Rewritten first.",
+                       "Last paragraph.", "Appended."]
+    assert applied == edits
+    assert rejected == []
+
+
+def test_apply_edits_without_edits_keeps_blocks():
+    assert apply_edits(BLOCKS, []) == (BLOCKS, [], [])
+
+
+@pytest.mark.parametrize("edit", [
+    {"op": "rewrite", "id": "p1", "text": "x"},
+    {"id": "p1", "text": "x"},
+    {"op": "replace", "id": "p0", "text": "x"},
+    {"op": "replace", "id": "p5", "text": "x"},
+    {"op": "replace", "id": "1", "text": "x"},
+    {"op": "replace", "id": "p1a", "text": "x"},
+    {"op": "delete"},
+    {"op": "replace", "id": "p1"},
+    {"op": "replace", "id": "p1", "text": "   "},
+    {"op": "insert_after", "id": "p1", "text": 42},
+])
+def test_apply_edits_rejects_invalid_edits(edit):
+    revised, applied, rejected = apply_edits(BLOCKS, [edit])
+    assert revised == BLOCKS
+    assert applied == []
+    assert rejected == [edit]
+
+
+@pytest.mark.parametrize("first, second", [
+    ({"op": "replace", "id": "p2", "text": "A"}, {"op": "replace", "id": "p2", "text": "B"}),
+    ({"op": "replace", "id": "p2", "text": "A"}, {"op": "delete", "id": "p2"}),
+    ({"op": "delete", "id": "p2"}, {"op": "replace", "id": "p2", "text": "B"}),
+    ({"op": "delete", "id": "p2"}, {"op": "delete", "id": "p2"}),
+])
+def test_apply_edits_rejects_second_edit_on_changed_block(first, second):
+    revised, applied, rejected = apply_edits(BLOCKS, [first, second])
+    assert applied == [first]
+    assert rejected == [second]
+    assert revised == (["Intro", "A", "Second paragraph.", "Last paragraph."] if first["op"] == "replace"
+                       else ["Intro", "Second paragraph.", "Last paragraph."])
+
+
+def test_insert_after_deleted_block_takes_its_place():
+    edits = [{"op": "delete", "id": "p2"}, {"op": "insert_after", "id": "p2", "text": "Instead."}]
+    revised, applied, rejected = apply_edits(BLOCKS, edits)
+    assert revised == ["Intro", "Instead.", "Second paragraph.", "Last paragraph."]
+    assert applied == edits and rejected == []
+
+
+def test_replace_after_insert_on_same_block_is_allowed():
+    edits = [{"op": "insert_after", "id": "p1", "text": "New."}, {"op": "replace", "id": "p1", "text": "Hello"}]
+    revised, applied, rejected = apply_edits(BLOCKS, edits)
+    assert revised[:2] == ["Hello", "New."]
+    assert rejected == []
+
+
+def test_unified_diff():
+    diff = unified_diff("a\nb\nc", "a\nB\nc")
+    assert diff.splitlines()[:2] == ["--- original", "+++ revised"]
+    assert "-b" in diff.splitlines() and "+B" in diff.splitlines()
+    assert unified_diff("same", "same") == ""
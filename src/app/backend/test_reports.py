@@ -0,0 +1,71 @@
+"""
+Score reports over a temporary results database. Run with pytest from this
+directory.
+"""
+
+import calendar
+
+import pytest
+
+from reports import build_report
+from results_store import ResultsStore, make_record
+
+
+def utc(date, hour=12):
+    return calendar.timegm(tuple(int(part) for part in date.split("-")) + (hour, 0, 0))
+
+
+def analysis(*scores):
+    categories = ["readability", "structure", "completeness", "style_guidelines"]
+    return {category: {"score": score, "issues": [], "suggestions": []} for category, score in zip(categories, scores)}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultsStore(str(tmp_path / "results.db"))
+
+
+def test_weekly_buckets_start_on_monday(store):
+    store.insert_many([
+        make_record("https://docs.test/a", analysis("Poor", "Poor", "Poor", "Poor"), "Poor",
+                    created_at=utc("2026-10-18", hour=23)),  # Sunday
+        make_record("https://docs.test/a", analysis("Good", "Good", "Good", "Good"), "Good",
+                    created_at=utc("2026-10-19", hour=0)),  # Monday
+        make_record("https://docs.test/b", analysis("Excellent", "Excellent", "Excellent", "Excellent"),
+                    "Excellent", created_at=utc("2026-10-25")),  # Sunday
+    ])
+    trends = build_report(store, period="week")["trends"]
+    assert [(bucket["period_start"], bucket["results"]) for bucket in trends] == [("2026-10-12", 1), ("2026-10-19", 2)]
+    assert trends[1]["readability"] == 3.5
+
+
+def test_daily_buckets_are_utc_days(store):
+    store.insert_many([
+        make_record("https://docs.test/a", analysis("Fair", "Fair", "Fair", "Fair"), "Fair",
+                    created_at=utc("2026-10-19", hour=hour))
+        for hour in (0, 23)
+    ] + [make_record("https://docs.test/a", analysis("Fair", "Fair", "Fair", "Fair"), "Fair",
+                     created_at=utc("2026-10-20", hour=0))])
+    trends = build_report(store, period="day")["trends"]
+    assert [(bucket["period_start"], bucket["results"]) for bucket in trends] == [("2026-10-19", 2), ("2026-10-20", 1)]
+
+
+def test_worst_pages_and_distributions_use_newest_result(store):
+    store.insert_many([
+        make_record("https://docs.test/a", analysis("Poor", "Poor", "Poor", "Poor"), "Poor",
+                    created_at=utc("2026-10-01")),
+        make_record("https://docs.test/a", analysis("Excellent", "Good", "Good", "Good"), "Good",
+                    created_at=utc("2026-10-02")),
+        make_record("https://docs.test/b", analysis("Fair", "Fair", "Poor", "Fair"), "Fair",
+                    created_at=utc("2026-10-01")),
+    ])
+    report = build_report(store, worst=1)
+    assert report["results"] == 3 and report["pages"] == 2
+    assert report["worst_pages"] == [{"url": "https://docs.test/b", "mean_score": 1.75, "readability": "Fair",
+                                      "structure": "Fair", "completeness": "Poor", "style_guidelines": "Fair"}]
+    assert report["distributions"]["readability"] == {"Poor": 0, "Fair": 1, "Good": 0, "Excellent": 1}
+
+
+def test_empty_store(store):
+    report = build_report(store, period="week")
+    assert report["results"] == 0 and report["worst_pages"] == [] and report["trends"] == []
@@ -0,0 +1,132 @@
+"""
+ModelRouter tier selection and cascading against the fake multi-tier
+backend from bench_routing.py. Run with pytest from this directory.
+
+Each fake tier answers the same way every time: an invalid or weak rate
+of 1.0 makes every answer invalid JSON or low-confidence.
+"""
+
+import json
+
+import pytest
+
+from bench_routing import FakeModelBackend, validate
+from routing import DEFAULT_TIERS, ModelRouter, tiers_from_env
+
+TIERS = [("lite", "fake-lite"), ("standard", "fake-standard"), ("pro", "fake-pro")]
+SHORT = "word " * 100
+MEDIUM = "word " * 3000
+LONG = "word " * 9000
+
+INVALID = (0.0, 1.0, 0.0)
+WEAK = (0.0, 0.0, 1.0)
+GOOD = (0.0, 0.0, 0.0)
+
+
+def make_router(lite, standard, pro, cascade=True):
+    backend = FakeModelBackend({"fake-lite": lite, "fake-standard": standard, "fake-pro": pro}, scale=0)
+    router = ModelRouter(TIERS, cascade=cascade)
+    calls = []
+
+    def run(content, task="analysis", previous_score=None):
+        def call(model):
+            calls.append(model)
+            return backend.call(model, content)
+        return router.run(task, content, call, validate, previous_score)
+
+    return router, run, calls
+
+
+def is_weak(analysis):
+    return not all(category["issues"] for category in analysis.values())
+
+
+@pytest.mark.parametrize("content, task, previous_score, tier", [
+    (SHORT, "analysis", None, 0),
+    (MEDIUM, "analysis", None, 1),
+    (LONG, "analysis", None, 2),
+    (SHORT, "analysis", "Fair", 0),
+    (SHORT, "analysis", "Poor", 1),
+    (SHORT, "revision", "Fair", 1),
+    (SHORT, "revision", "Good", 0),
+    (LONG, "analysis", "Poor", 2),
+])
+def test_select_tier(content, task, previous_score, tier):
+    assert ModelRouter(TIERS).select_tier(task, content, previous_score) == tier
+
+
+def test_confident_answer_stops_at_starting_tier():
+    router, run, calls = make_router(GOOD, GOOD, GOOD)
+    assert not is_weak(run(SHORT))
+    assert run(MEDIUM) and run(LONG)
+    assert calls == ["fake-lite", "fake-standard", "fake-pro"]
+    assert all(stats["escalations"] == 0 for stats in router.stats().values())
+
+
+def test_escalates_on_invalid_and_low_confidence_output():
+    router, run, calls = make_router(INVALID, WEAK, GOOD)
+    result = run(SHORT)
+    assert calls == ["fake-lite", "fake-standard", "fake-pro"]
+    assert not is_weak(result)
+
+    stats = router.stats()
+    assert {name: (tier["calls"], tier["failures"], tier["escalations"]) for name, tier in stats.items()} == {
+        "lite": (1, 1, 1), "standard": (1, 0, 1), "pro": (1, 0, 0)
+    }
+    assert stats["lite"]["escalation_rate"] == 1.0 and stats["pro"]["escalation_rate"] == 0.0
+    assert stats["pro"]["model"] == "fake-pro" and stats["pro"]["avg_latency"] is not None
+
+
+def test_last_tier_answer_is_returned_even_if_weak():
+    _, run, calls = make_router(WEAK, WEAK, WEAK)
+    assert is_weak(run(SHORT))
+    assert calls == ["fake-lite", "fake-standard", "fake-pro"]
+
+
+def test_falls_back_to_earlier_answer_when_last_tier_is_invalid():
+    router, run, calls = make_router(INVALID, WEAK, INVALID)
+    result = run(SHORT)
+    assert calls == ["fake-lite", "fake-standard", "fake-pro"]
+    assert is_weak(result)
+    assert router.stats()["pro"]["failures"] == 1
+
+
+def test_raises_when_no_tier_answers():
+    router, run, _ = make_router(INVALID, INVALID, INVALID)
+    with pytest.raises(json.JSONDecodeError):
+        run(SHORT)
+    assert [tier["failures"] for tier in router.stats().values()] == [1, 1, 1]
+
+
+def test_without_cascade_only_the_starting_tier_is_called():
+    _, run, calls = make_router(WEAK, INVALID, GOOD, cascade=False)
+    assert is_weak(run(SHORT))
+    with pytest.raises(ValueError):
+        run(MEDIUM)
+    assert calls == ["fake-lite", "fake-standard"]
+
+
+def test_call_errors_propagate_and_count_as_calls():
+    router = ModelRouter(TIERS)
+
+    def call(model):
+        raise TimeoutError("model timed out")
+
+    with pytest.raises(TimeoutError):
+        router.run("analysis", SHORT, call, validate)
+    assert router.stats()["lite"]["calls"] == 1 and router.stats()["standard"]["calls"] == 0
+
+
+def test_tracking_records_the_route():
+    router, run, _ = make_router(INVALID, GOOD, GOOD)
+    with router.tracking() as route:
+        run(SHORT)
+        run(LONG)
+    run(SHORT)
+    assert route == ["lite", "standard", "pro"]
+
+
+def test_tiers_from_env():
+    assert tiers_from_env("lite=a, pro = b") == [("lite", "a"), ("pro", "b")]
+    assert tiers_from_env("nonsense") == DEFAULT_TIERS
+    assert tiers_from_env("") == DEFAULT_TIERS
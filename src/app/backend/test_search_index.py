@@ -0,0 +1,89 @@
+"""
+SearchIndex ranking, replacement of re-scraped pages and save/load round
+trips. Run with pytest from this directory.
+"""
+
+import threading
+
+import pytest
+
+from search_index import SearchIndex
+
+PAGES = {
+    "https://docs.test/push": "Push notifications\nSend push notifications to Android and iOS devices.",
+    "https://docs.test/email": "Email campaigns\nDesign email campaigns with templates and send them.",
+    "https://docs.test/segments": "Segments\nBuild user segments from events and attributes.",
+}
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    for url, content in PAGES.items():
+        index.add(url, content)
+    return index
+
+
+def test_search_ranks_matching_pages(index):
+    hits = index.search("push notifications android")
+    assert [hit["url"] for hit in hits] == ["https://docs.test/push"]
+    assert hits[0]["title"] == "Push notifications"
+    assert "Android" in hits[0]["snippet"]
+    assert index.search("email", exclude_url="https://docs.test/email") == []
+    assert index.search("") == []
+
+
+def test_readding_a_page_replaces_it(index):
+    assert not index.add("https://docs.test/push", PAGES["https://docs.test/push"])
+    assert index.add("https://docs.test/push", "Push notifications\nNow about web push in browsers.")
+    assert index.search("android") == []
+    assert [hit["url"] for hit in index.search("browsers")] == ["https://docs.test/push"]
+    stats = index.stats()
+    assert stats["documents"] == 3 and stats["superseded"] == 1
+
+
+def test_save_and_load_round_trip(index, tmp_path):
+    index.add("https://docs.test/push", "Push notifications\nNow about web push in browsers.")
+    path = str(tmp_path / "index.bin")
+    index.save(path)
+    assert not index.dirty
+
+    loaded = SearchIndex(path)
+    stats = loaded.stats()
+    assert stats["documents"] == 3 and stats["superseded"] == 0
+    for query in ("browsers", "email templates", "segments events"):
+        assert loaded.search(query) == index.search(query)
+    assert not loaded.add("https://docs.test/email", PAGES["https://docs.test/email"])
+    assert not (tmp_path / "index.bin.tmp").exists()
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "index.bin"
+    path.write_bytes(b"not an index")
+    with pytest.raises(ValueError):
+        SearchIndex(str(path))
+
+
+def test_concurrent_saves_and_adds_stay_loadable(tmp_path):
+    path = str(tmp_path / "index.bin")
+    index = SearchIndex(path)
+
+    def add(start):
+        for n in range(start, start + 100):
+            index.add(f"https://docs.test/{n}", f"Page {n}\nword{n} shared text")
+
+    def save():
+        for _ in range(5):
+            index.save()
+
+    threads = [threading.Thread(target=add, args=(n * 100,)) for n in range(3)]
+    threads += [threading.Thread(target=save) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    index.save()
+
+    loaded = SearchIndex(path)
+    assert loaded.stats()["documents"] == 300
+    assert [hit["url"] for hit in loaded.search("word250")] == ["https://docs.test/250"]
@@ -0,0 +1,142 @@
+"""
+TabScraper against a stub driver, so scheduling and failure handling can be
+tested without Chrome. Run with pytest from this directory.
+
+URLs steer the stub: "slow" never becomes ready, "heavy" exceeds the heap
+budget, "flaky" throws JavaScript errors for its first polls, "closed"
+loses its tab and "lost" ends the whole session.
+"""
+
+import itertools
+import time
+
+import pytest
+from selenium.common.exceptions import InvalidSessionIdException, JavascriptException, NoSuchWindowException
+
+import tab_scraper
+from tab_scraper import TabScraper
+
+handles = itertools.count()
+
+
+class StubSwitch:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        if handle not in self.driver.windows:
+            raise NoSuchWindowException("no such window")
+        self.driver.current = handle
+
+    def new_window(self, kind):
+        handle = f"tab{next(handles)}"
+        self.driver.windows[handle] = None
+        self.driver.current = handle
+
+
+class StubDriver:
+    sessions = 0
+
+    def __init__(self, options=None):
+        StubDriver.sessions += 1
+        self.windows = {}  # handle -> (url, load start, polls) or None
+        self.lost = False
+        self.switch_to = StubSwitch(self)
+        self.switch_to.new_window("tab")
+
+    @property
+    def current_window_handle(self):
+        return self.current
+
+    @property
+    def window_handles(self):
+        return list(self.windows)
+
+    def execute_script(self, script, *args):
+        if self.lost:
+            raise InvalidSessionIdException("invalid session id")
+        if script.startswith("window.__tabScraperStale"):
+            self.windows[self.current] = (args[0], time.monotonic(), 0)
+            return None
+        if script != tab_scraper.STATE_SCRIPT:
+            return None
+        url, started, polls = self.windows[self.current]
+        self.windows[self.current] = (url, started, polls + 1)
+        if "closed" in url and StubDriver.sessions == 1:
+            del self.windows[self.current]
+            raise NoSuchWindowException("no such window")
+        if "lost" in url and StubDriver.sessions == 1:
+            self.lost = True
+            raise InvalidSessionIdException("invalid session id")
+        if "flaky" in url and polls < 3:
+            raise JavascriptException("javascript error: Execution context was destroyed")
+        ready = "slow" not in url and time.monotonic() - started > 0.05
+        heap = 10 ** 10 if "heavy" in url else 0
+        return [ready, ready, heap]
+
+    @property
+    def page_source(self):
+        url = self.windows[self.current][0]
+        return f"<h1>{url}</h1><p>Body</p>"
+
+    def close(self):
+        del self.windows[self.current]
+
+    def quit(self):
+        self.lost = True
+
+
+@pytest.fixture(autouse=True)
+def stub_chrome(monkeypatch):
+    StubDriver.sessions = 0
+    monkeypatch.setattr(tab_scraper.webdriver, "Chrome", StubDriver)
+    monkeypatch.setattr(tab_scraper, "POLL_INTERVAL", 0.01)
+
+
+def scrape(urls, **kwargs):
+    options = {"tabs": 3, "settle": 0.01, "page_timeout": 0.5, **kwargs}
+    with TabScraper(**options) as scraper:
+        pages, errors = scraper.scrape(urls)
+        return pages, errors, scraper.stats()
+
+
+def test_scrapes_every_page_and_recycles():
+    urls = [f"http://docs.test/{n}" for n in range(10)]
+    pages, errors, stats = scrape(urls, recycle_after=4)
+    assert sorted(pages) == sorted(urls)
+    assert not errors
+    assert pages[urls[0]]["content"].startswith("\nhttp://docs.test/0")
+    assert stats["restarts"] == 1
+
+
+def test_slow_and_heavy_pages_fail_alone():
+    urls = ["http://docs.test/slow", "http://docs.test/heavy", "http://docs.test/ok"]
+    pages, errors, stats = scrape(urls)
+    assert list(pages) == ["http://docs.test/ok"]
+    assert errors["http://docs.test/slow"].startswith("not ready")
+    assert "JS heap" in errors["http://docs.test/heavy"]
+    assert stats["timeouts"] == 1 and stats["memory_kills"] == 1 and stats["restarts"] == 0
+
+
+def test_transient_script_errors_keep_polling():
+    urls = ["http://docs.test/flaky", "http://docs.test/ok"]
+    pages, errors, stats = scrape(urls)
+    assert sorted(pages) == sorted(urls)
+    assert not errors
+    assert stats["tab_errors"] == 3 and stats["restarts"] == 0
+
+
+def test_closed_tab_is_reopened_without_restart():
+    urls = ["http://docs.test/closed", "http://docs.test/ok"]
+    pages, errors, stats = scrape(urls)
+    assert list(pages) == ["http://docs.test/ok"]
+    assert errors == {"http://docs.test/closed": "tab crashed"}
+    assert stats["restarts"] == 0
+
+
+def test_lost_session_restarts_and_retries():
+    urls = ["http://docs.test/lost", "http://docs.test/a", "http://docs.test/b"]
+    pages, errors, stats = scrape(urls)
+    assert sorted(pages) == sorted(urls)
+    assert not errors
+    assert stats["restarts"] == 1
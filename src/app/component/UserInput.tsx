@@ -37,25 +37,54 @@ const UserInput = () => {
     setRevised(null);
     setLastContent(null);
     
+    // Analysis and revision come back on one streamed request: the analysis
+    // line arrives first, the revision follows when it's ready
     try {
-      const res = await fetch("http://localhost:8000/analyze", {
+      const res = await fetch("http://localhost:8000/analyze-and-revise", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ url }),
       });
 
-      if (!res.ok) {
+      if (!res.ok || !res.body) {
         const data = await res.json();
         throw new Error(data.detail || "Something went wrong");
       }
 
-      const data = await res.json();
-      setResult(data.analysis);  // Store analysis part
-      setLastContent(data.content);  // Store content part
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      const handleLine = (line: string) => {
+        if (!line.trim()) return;
+        const data = JSON.parse(line);
+        if (data.type === "analysis") {
+          setResult(data.analysis);  // Store analysis part
+          setLastContent(data.content);  // Store content part
+          setLoading(false);
+          setRevising(true);
+        } else if (data.type === "revision") {
+          setRevised(data.revised);
+          setRevising(false);
+        } else if (data.type === "error") {
+          setRevised(data.detail || "Revision failed");
+          setRevising(false);
+        }
+      };
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop() ?? "";
+        lines.forEach(handleLine);
+      }
+      handleLine(buffer);
     } catch (err: Error | unknown) {
       setError(err instanceof Error ? err.message : "Error occurred");
     } finally {
       setLoading(false);
+      setRevising(false);
     }
   };
 